@@ -1,14 +1,35 @@
 """Authentication utilities."""
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, event
 from models import User, UserRole
 from config import settings
+from cache import TTLCache
+import logging
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    # Any other round count is flagged by verify_and_update so logins rehash it
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+
+# Hashing is CPU-bound for tens of milliseconds, so it runs off the event loop
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+# Resolved users by id (as CachedUser snapshots); see get_user_by_id_cached for invalidation
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.USER_CACHE_TTL_SECONDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -21,6 +42,47 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _get_hash_executor() -> Optional[ProcessPoolExecutor]:
+    global _hash_pool
+    if _hash_pool is None and settings.PASSWORD_HASH_WORKERS > 0:
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _hash_pool
+
+
+async def _run_hash_job(fn, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    async with _hash_slots:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the event loop.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses outdated
+    parameters and should be replaced.
+    """
+    return await _run_hash_job(_verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password off the event loop."""
+    return await _run_hash_job(get_password_hash, password)
+
+
+def shutdown_hash_pool():
+    """Stop the password hashing worker processes."""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -45,11 +107,52 @@ async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
+@dataclass(frozen=True)
+class CachedUser:
+    """Immutable copy of the columns requests need from an authenticated user.
+
+    Not an ORM instance, so it doesn't depend on the session it was loaded in
+    (a rollback there would expire a shared instance for every later request).
+    """
+    id: str
+    email: str
+    role: UserRole
+
+
+async def get_user_by_id_cached(db: AsyncSession, user_id: str) -> Optional[CachedUser]:
+    """Get user by ID through the bounded TTL user cache.
+
+    Entries are dropped when this process flushes an update or delete of the
+    user through the ORM. Bulk `update()`/`delete()` statements and writes by
+    other workers are not seen, so those reach requests only after
+    USER_CACHE_TTL_SECONDS.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        row = await get_user_by_id(db, user_id)
+        if row is None:
+            return None
+        user = CachedUser(id=row.id, email=row.email, role=row.role)
+        user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id: str):
+    """Drop a user from the resolved-user cache."""
+    user_cache.delete(str(user_id))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
 def decode_token(token: str) -> Optional[dict]:
     """Decode and verify JWT token."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError as e:
-        print(f"JWT Decode Error: {str(e)}")
+        logger.debug("JWT decode error: %s", e)
         return None
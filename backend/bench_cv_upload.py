@@ -0,0 +1,105 @@
+"""Benchmark CV upload storage under concurrent uploads.
+
+Compares the old handler body (blocking shutil.copyfileobj on the event loop)
+with uploads.save_upload (chunked reads, writes and hashing in worker
+threads). Reports per-upload latency, aggregate throughput and how late a
+5 ms probe tick fires, which stands in for every other request on the loop.
+
+Usage: python bench_cv_upload.py [uploads] [size_mb] [concurrency]
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+# Store into a scratch local backend rather than the working directory
+ROOT = tempfile.mkdtemp(prefix="bench-cv-")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_ROOT"] = ROOT
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from uploads import save_upload
+
+CHUNK = 1024 * 1024
+
+
+def make_upload(data: bytes) -> UploadFile:
+    # Starlette spools multipart files to disk past 1 MB, as in the real handler
+    spooled = tempfile.SpooledTemporaryFile(max_size=CHUNK)
+    spooled.write(data)
+    spooled.seek(0)
+    return UploadFile(spooled, size=len(data), filename="cv.pdf", headers=Headers({"content-type": "application/pdf"}))
+
+
+async def legacy_store(file: UploadFile, directory: str):
+    path = os.path.join(ROOT, directory, f"{uuid.uuid4().hex}.pdf")
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+
+async def streamed_store(file: UploadFile, directory: str):
+    await save_upload(file, directory, max_bytes=1 << 40, chunk_size=CHUNK,
+                      staging_dir=os.path.join(ROOT, ".uploads"))
+
+
+async def probe(stop: asyncio.Event, delays: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        delays.append(time.perf_counter() - start - 0.005)
+
+
+async def run(label: str, store, payloads, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    directory = label
+    os.makedirs(os.path.join(ROOT, directory))
+    files = [make_upload(data) for data in payloads]
+
+    async def one(file):
+        async with slots:
+            start = time.perf_counter()
+            await store(file, directory)
+            latencies.append(time.perf_counter() - start)
+
+    stop, delays = asyncio.Event(), []
+    probe_task = asyncio.create_task(probe(stop, delays))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(f) for f in files))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    stored = len(os.listdir(os.path.join(ROOT, directory)))
+
+    total_mb = sum(len(p) for p in payloads) / CHUNK
+    q = statistics.quantiles(latencies, n=100)
+    lag = statistics.quantiles(delays, n=100, method="inclusive") if len(delays) > 1 else [0.0] * 99
+    print(f"{label:9s} {total_mb / elapsed:8.1f} MB/s  upload p50={q[49] * 1000:7.1f}ms p95={q[94] * 1000:7.1f}ms  "
+          f"loop lag p99={lag[98] * 1000:6.1f}ms max={max(delays, default=0) * 1000:6.1f}ms "
+          f"ticks={len(delays)}  files={stored}")
+
+
+def main():
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    size_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 4
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    # Half the uploads repeat earlier content to show deduplication
+    unique = [os.urandom(int(size_mb * CHUNK)) for _ in range((uploads + 1) // 2)]
+    payloads = [unique[i % len(unique)] for i in range(uploads)]
+    print(f"uploads={uploads} size={size_mb} MB concurrency={concurrency} unique={len(unique)}")
+    try:
+        asyncio.run(run("legacy", legacy_store, payloads, concurrency))
+        asyncio.run(run("streamed", streamed_store, payloads, concurrency))
+    finally:
+        shutil.rmtree(ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Exercise the LLM gateway against a local stub provider.
+
+Starts a stub HTTP server that behaves like a rate-limited model API (fixed
+latency, a concurrency cap and a per-window request quota, answering 429
+beyond them) and fires a burst of interactive and background calls, first
+directly and then through the gateway.
+
+Usage: python bench_llm_gateway.py [interactive] [background] [rpm]
+"""
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from llm_gateway import LLMGateway, GatewayRejected, INTERACTIVE, BACKGROUND
+
+LATENCY = 0.05
+MAX_CONCURRENT = 4
+
+
+class StubProvider(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    active = 0
+    window_start = time.monotonic()
+    window_count = 0
+    rpm = 120
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            now = time.monotonic()
+            if now - cls.window_start >= 60:
+                cls.window_start, cls.window_count = now, 0
+            limited = cls.active >= MAX_CONCURRENT or cls.window_count >= cls.rpm
+            if not limited:
+                cls.active += 1
+                cls.window_count += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if limited:
+            self.send_response(429)
+            self.end_headers()
+            return
+        time.sleep(LATENCY)
+        with cls.lock:
+            cls.active -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+async def run(label: str, url: str, interactive: int, background: int, gateway=None):
+    StubProvider.window_start, StubProvider.window_count = time.monotonic(), 0
+    latencies = {INTERACTIVE: [], BACKGROUND: []}
+    outcomes = {"ok": 0, "429": 0, "rejected": 0}
+
+    async with httpx.AsyncClient() as client:
+        async def one(priority: int):
+            start = time.perf_counter()
+            try:
+                if gateway:
+                    response = await gateway.call(
+                        "stub", lambda: client.post(url, json={}), priority=priority,
+                        timeout=10.0 if priority == INTERACTIVE else 60.0,
+                    )
+                else:
+                    response = await client.post(url, json={})
+            except GatewayRejected:
+                outcomes["rejected"] += 1
+                return
+            outcomes["ok" if response.status_code == 200 else "429"] += 1
+            latencies[priority].append(time.perf_counter() - start)
+
+        # Background work arrives first, interactive calls right behind it
+        calls = [one(BACKGROUND) for _ in range(background)] + [one(INTERACTIVE) for _ in range(interactive)]
+        await asyncio.gather(*calls)
+
+    def p(values, q):
+        return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else 0.0
+
+    print(f"{label:8s} ok={outcomes['ok']:4d} 429={outcomes['429']:4d} rejected={outcomes['rejected']:4d} "
+          f"interactive p50={p(latencies[INTERACTIVE], 50):7.1f}ms p95={p(latencies[INTERACTIVE], 95):7.1f}ms "
+          f"background p50={p(latencies[BACKGROUND], 50):7.1f}ms")
+    if gateway:
+        print(f"         {gateway.stats()['stub']}")
+
+
+def main():
+    interactive = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    background = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rpm = int(sys.argv[3]) if len(sys.argv) > 3 else 600
+    StubProvider.rpm = rpm
+
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubProvider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1beta/models/stub:generateContent"
+    print(f"stub provider: {MAX_CONCURRENT} concurrent, {rpm} rpm, {LATENCY * 1000:.0f} ms latency")
+
+    asyncio.run(run("direct", url, interactive, background))
+    # Leave headroom under the provider quota for the token bucket's initial burst
+    gateway = LLMGateway(concurrency=MAX_CONCURRENT, rpm=int(rpm * 0.85), max_queue=interactive + background)
+    asyncio.run(run("gateway", url, interactive, background, gateway))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark login throughput and event-loop latency under a login storm.
+
+Runs N concurrent password verifications either inline on the event loop
+(the old behaviour) or through the hashing process pool, while a probe
+coroutine stands in for every other endpoint and records how late its
+5 ms ticks fire.
+
+Usage: python bench_password_hashing.py [logins] [concurrency]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from auth import get_password_hash, verify_password, verify_password_async, shutdown_hash_pool
+
+
+async def probe(stop: asyncio.Event, delays: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        delays.append(time.perf_counter() - start - 0.005)
+
+
+async def storm(mode: str, hashed: str, logins: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with slots:
+            if mode == "inline":
+                verify_password("password123", hashed)
+                await asyncio.sleep(0)
+            else:
+                await verify_password_async("password123", hashed)
+
+    stop, delays = asyncio.Event(), []
+    probe_task = asyncio.create_task(probe(stop, delays))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    p99 = statistics.quantiles(delays, n=100)[98] if len(delays) >= 2 else float("nan")
+    print(f"{mode:7s} logins/s={logins / elapsed:7.1f}  probe ticks={len(delays):5d}  "
+          f"probe p99 lag={p99 * 1000:7.2f} ms")
+
+
+async def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    hashed = get_password_hash("password123")
+    await verify_password_async("password123", hashed)  # Start the pool before timing
+    for mode in ("inline", "pool"):
+        await storm(mode, hashed, logins, concurrency)
+    shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
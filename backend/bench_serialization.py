@@ -0,0 +1,65 @@
+"""Benchmark response encoding for match payloads.
+
+Compares the old path (jsonable_encoder + stdlib JSONResponse) with typed
+response models + ORJSONResponse, per 1k rows.
+
+Usage: python bench_serialization.py [rows] [repeats]
+"""
+import sys
+import time
+import uuid
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from routers.matches import TalentMatch
+
+
+def make_rows(n: int) -> List[dict]:
+    return [{
+        "talent_id": str(uuid.uuid4()),
+        "name": f"Talent {i}",
+        "headline": "Full-stack developer building fintech products in Kathmandu",
+        "user_id": str(uuid.uuid4()),
+        "match_percentage": round(100 * (i % 97) / 97, 2),
+        "score_breakdown": {"skills": 0.42, "semantic": 0.77},
+        "matched_skills": ["python", "react", "postgresql"],
+        "missing_skills": ["kubernetes", "go"],
+    } for i in range(n)]
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rows_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rows = make_rows(rows_count)
+    adapter = TypeAdapter(List[TalentMatch])
+
+    def legacy():
+        JSONResponse(jsonable_encoder(rows))
+
+    def typed():
+        ORJSONResponse(adapter.dump_python(adapter.validate_python(rows), mode="json"))
+
+    legacy_s = best_of(legacy, repeats)
+    typed_s = best_of(typed, repeats)
+    per_k = 1000 / rows_count * 1000
+    print(f"rows={rows_count} repeats={repeats}")
+    print(f"jsonable_encoder + JSONResponse : {legacy_s * per_k:8.2f} ms / 1k rows")
+    print(f"response model + ORJSONResponse: {typed_s * per_k:8.2f} ms / 1k rows")
+    print(f"saved                          : {(legacy_s - typed_s) * per_k:8.2f} ms / 1k rows "
+          f"({legacy_s / typed_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Response caching with LRU + TTL storage and data-version invalidation."""
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from config import settings
+from singleflight import match_flights
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Shared backend is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class DataVersions:
+    """Monotonic version counters per data domain ("talent", "startups", ...).
+
+    Writers bump the domains they touch; cache keys embed the versions of the
+    domains a response depends on, so a bump makes older entries unreachable.
+    With a shared backend the counters live there so every instance sees them.
+
+    Without one, a write handled by another worker never bumps this process's
+    counters, so local snapshots also carry a time bucket of `local_ttl`
+    seconds: cache keys and ETags derived from them expire after at most that
+    long instead of validating stale data indefinitely.
+    """
+
+    def __init__(self, shared=None, local_ttl: float = 60.0):
+        self._local: Dict[str, int] = {}
+        self._shared = shared
+        self.local_ttl = local_ttl
+        # Local counters restart at zero, so their snapshots are namespaced per process
+        self._epoch = uuid.uuid4().hex[:12]
+
+    async def bump(self, *domains: str):
+        for domain in domains:
+            self._local[domain] = self._local.get(domain, 0) + 1
+            if self._shared:
+                try:
+                    await self._shared.incr(f"dataver:{domain}")
+                except Exception as e:
+                    logger.warning("Cache backend error on version bump: %s", e)
+
+    async def snapshot(self, domains: Iterable[str]) -> Tuple:
+        domains = tuple(domains)
+        if self._shared:
+            try:
+                values = await self._shared.mget([f"dataver:{d}" for d in domains])
+                return ("shared",) + tuple(int(v or 0) for v in values)
+            except Exception as e:
+                logger.warning("Cache backend error on version read: %s", e)
+        bucket = int(time.time() // self.local_ttl) if self.local_ttl > 0 else 0
+        return (self._epoch, bucket) + tuple(self._local.get(d, 0) for d in domains)
+
+
+class ResponseCache:
+    """Per-process LRU + TTL cache, optionally backed by a shared Redis store."""
+
+    def __init__(self, local: TTLCache, shared=None, enabled: bool = True):
+        self.local = local
+        self.shared = shared
+        self.enabled = enabled
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    @staticmethod
+    def make_key(user_id: str, endpoint: str, params: Dict[str, Any], versions: Tuple[int, ...]) -> str:
+        raw = json.dumps([str(user_id), endpoint, sorted(params.items()), versions], default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    async def get(self, key: str):
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING or not self.shared:
+            return value
+        try:
+            raw = await self.shared.get(f"resp:{key}")
+        except Exception as e:
+            logger.warning("Cache backend error on get: %s", e)
+            return _MISSING
+        if raw is None:
+            self.shared_misses += 1
+            return _MISSING
+        self.shared_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value):
+        self.local.set(key, value)
+        if self.shared:
+            try:
+                await self.shared.set(f"resp:{key}", json.dumps(value, default=str), ex=int(self.local.ttl))
+            except Exception as e:
+                logger.warning("Cache backend error on set: %s", e)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        if not self.enabled:
+            return await compute()
+        value = await self.get(key)
+        if value is _MISSING:
+            value = await self.compute_and_set(key, compute)
+        return value
+
+    async def compute_and_set(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        value = await compute()
+        if self.enabled:
+            await self.set(key, value)
+        return value
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"enabled": self.enabled, "local": self.local.stats()}
+        if self.shared:
+            total = self.shared_hits + self.shared_misses
+            stats["shared"] = {
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "hit_ratio": round(self.shared_hits / total, 4) if total else 0.0,
+            }
+        return stats
+
+
+_shared_backend = (
+    aioredis.from_url(settings.CACHE_REDIS_URL)
+    if settings.CACHE_REDIS_URL and aioredis else None
+)
+
+data_versions = DataVersions(shared=_shared_backend, local_ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+response_cache = ResponseCache(
+    TTLCache(maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES, ttl=settings.RESPONSE_CACHE_TTL_SECONDS),
+    shared=_shared_backend,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
+
+
+async def cached_response(
+    user_id: str,
+    endpoint: str,
+    params: Dict[str, Any],
+    domains: Iterable[str],
+    compute: Callable[[], Awaitable[Any]],
+    versions: Optional[Tuple] = None,
+):
+    """Serve `compute()` through the response cache, keyed by the domains' data versions.
+
+    Concurrent misses for the same key share one computation. `compute` must not
+    depend on the caller's request-scoped resources (such as its DB session),
+    since it may outlive the request that started it. Pass `versions` when the
+    caller already took a snapshot (e.g. to build an ETag).
+    """
+    if versions is None:
+        versions = await data_versions.snapshot(domains)
+    key = ResponseCache.make_key(user_id, endpoint, params, versions)
+    if response_cache.enabled:
+        value = await response_cache.get(key)
+        if value is not _MISSING:
+            return value
+    return await match_flights.do(key, lambda: response_cache.compute_and_set(key, compute))
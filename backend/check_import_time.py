@@ -0,0 +1,70 @@
+"""Fail when importing the app gets slower than the cold-start budget.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, reports
+the heaviest modules, and exits non-zero if the cumulative import time of
+`main` exceeds the budget or a module that should load lazily (the Gemini /
+langchain clients) was imported. Autoscaled containers pay this on every
+scale-out; tests/test_import_time.py runs the same check in the test suite.
+
+Usage: python check_import_time.py [budget_ms] [top]
+"""
+import os
+import re
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 1500
+# Must only be imported on first use or during warmup
+LAZY_MODULES = ("langchain_google_genai", "langchain_core", "google.genai", "google.generativeai")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(runs: int = 3):
+    """Best-of-`runs` import profile: (cumulative us of main, {module: (self us, cumulative us)})."""
+    best = None
+    here = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=here, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            sys.exit(f"import main failed:\n{proc.stderr[-2000:]}")
+        modules = {}
+        for line in proc.stderr.splitlines():
+            match = _LINE.match(line)
+            if match:
+                modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+        total = modules["main"][1]
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    total_us, modules = measure()
+    print(f"import main: {total_us / 1000:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"\nTop {top} modules by self time:")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda kv: -kv[1][0])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:8.1f} ms)  {name}")
+
+    eager = sorted(name for name in modules if name.startswith(LAZY_MODULES))
+    failed = False
+    if eager:
+        print(f"\nFAIL: lazily loaded modules were imported at startup: {', '.join(eager[:5])}"
+              + (" ..." if len(eager) > 5 else ""))
+        failed = True
+    if total_us / 1000 > budget_ms:
+        print(f"\nFAIL: import time {total_us / 1000:.1f} ms exceeds the {budget_ms:.0f} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """Configuration settings for NepLaunch backend."""
 from pydantic_settings import BaseSettings
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from pydantic import field_validator
 
 
@@ -20,15 +20,47 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Password hashing (pbkdf2_sha256); hashes with other rounds are upgraded on login
+    PASSWORD_HASH_ROUNDS: int = 29000
+    PASSWORD_HASH_WORKERS: int = 2  # Process pool size; 0 hashes in the default thread pool
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Hash jobs submitted to the pool at once
+    
+    # Authenticated-user cache (saves the users lookup on every request). Invalidated on
+    # ORM updates in this process only; other workers see role changes after the TTL
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    # Let role-gated routes that only need id/role trust the token's role claim (no DB lookup)
+    TRUST_TOKEN_ROLE: bool = False
+    
     # AWS
     AWS_REGION: str = "ap-south-1"
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     S3_PUBLIC_BUCKET: str = "neplaunch-public"
     S3_PRIVATE_BUCKET: str = "neplaunch-private"
+    S3_ENDPOINT_URL: Optional[str] = None  # S3-compatible endpoint, e.g. a local MinIO at http://localhost:9000
+    
+    # File storage: "local" (files under LOCAL_STORAGE_ROOT, served by the signed /files routes) or "s3"
+    STORAGE_BACKEND: str = "local"
+    LOCAL_STORAGE_ROOT: str = "~/.neplaunch/storage"  # Keep outside the source tree; nothing else may live here
+    PUBLIC_BASE_URL: str = "http://localhost:8000"  # Base of locally signed file URLs
+    PRESIGNED_URL_TTL_SECONDS: int = 900
     
     # Gemini
     GOOGLE_API_KEY: Optional[str] = None
+    GEMINI_API_ENDPOINT: Optional[str] = None  # e.g. "localhost:8090" to point clients at a stub server (REST transport)
+    
+    # LLM gateway: per-model admission control for Gemini calls
+    LLM_DEFAULT_CONCURRENCY: int = 4
+    LLM_DEFAULT_RPM: int = 60  # 0 disables the requests-per-minute budget
+    LLM_MAX_QUEUE: int = 100  # Calls waiting per model before new ones are rejected
+    LLM_CHAT_CONCURRENCY: int = 4
+    LLM_CHAT_RPM: int = 15
+    LLM_EMBEDDING_CONCURRENCY: int = 8
+    LLM_EMBEDDING_RPM: int = 1500
+    LLM_INTERACTIVE_TIMEOUT_SECONDS: float = 10.0  # Longest queue wait for user-facing calls
+    LLM_BACKGROUND_TIMEOUT_SECONDS: float = 120.0
+    LLM_WARMUP_ON_STARTUP: bool = True  # Build Gemini clients in the background after startup instead of on first use
     
     # CORS
     CORS_ORIGINS: Union[list[str], str] = ["http://localhost:5173", "http://localhost:5174", "http://localhost:5175", "http://localhost:3000"]
@@ -42,9 +74,86 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
     
+    # Response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    CACHE_REDIS_URL: Optional[str] = None  # Shared cache backend, e.g. redis://localhost:6379/0
+    
+    # AI pitch feedback cache (in-memory LRU in front of the pitch_feedback_cache table)
+    PITCH_CACHE_MAX_ENTRIES: int = 512
+    PITCH_CACHE_TTL_SECONDS: int = 60 * 60
+    
+    # In-memory match index: how often to check the embeddings table for other workers' writes
+    MATCH_INDEX_REFRESH_SECONDS: float = 5.0
+    
+    # Rows fetched per round trip by server-side cursors when streaming results
+    STREAM_BATCH_SIZE: int = 500
+    
+    # Response compression (brotli is used when installed and accepted)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    
+    # CV uploads (stored once per sha256 under the CV_UPLOAD_DIR key prefix)
+    CV_UPLOAD_DIR: str = "cv"
+    UPLOAD_STAGING_DIR: str = ".uploads"  # Local scratch space while a proxied upload streams in
+    CV_MAX_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    
+    # CV text extraction (runs in background worker processes and feeds the 'cv' talent embedding)
+    CV_EXTRACT_WORKERS: int = 1  # Concurrent extraction processes; 0 extracts in the default thread pool
+    CV_EXTRACT_TIMEOUT_SECONDS: float = 60.0
+    CV_TEXT_MAX_CHARS: int = 20000  # Extracted text kept per CV
+    CV_EMBEDDING_WEIGHT: float = 0.35  # Share of the CV vector in the blended talent vector
+    
+    # Startup / readiness
+    DB_POOL_PRIME_CONNECTIONS: int = 5  # Connections opened before reporting ready
+    STARTUP_RETRY_SECONDS: float = 5.0  # Delay before retrying a failed startup phase
+    READINESS_DB_TIMEOUT_SECONDS: float = 2.0
+    
+    # Logging (written by a background thread; see logging_config.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    LOG_LEVELS: Dict[str, str] = {}  # Per-logger levels, e.g. {"matching": "DEBUG"} for per-pair match scoring
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # Share of a logger's sub-WARNING records kept, e.g. {"matching": 0.01}
+    
+    # Prometheus metrics at /metrics; with METRICS_TOKEN set, scrapers must send "Authorization: Bearer <token>"
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    
+    # SQL query profiler: per-request statement counts and repeated statement shapes (N+1 warnings)
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 10  # Warn when one statement shape runs more often in a request
+    DEBUG: bool = False  # Enables the query profiler and adds X-DB-Query-Count / X-DB-Time response headers
+    
+    # Sampling profiler. With ADMIN_TOKEN set, `?profile=1` (or "X-Profile: 1") plus X-Admin-Token returns the
+    # request's collapsed stacks instead of its response. Nothing is installed or sampled while disabled.
+    PROFILER_ENABLED: bool = False
+    PROFILER_REQUEST_INTERVAL_MS: float = 1.0  # Per-request sampling interval
+    PROFILER_PERIODIC_ENABLED: bool = False  # Always-on low-rate sampling, aggregated into files
+    PROFILER_PERIODIC_INTERVAL_MS: float = 50.0
+    PROFILER_FLUSH_SECONDS: float = 300.0  # One .folded file per period
+    PROFILER_OUTPUT_DIR: str = "./profiles"
+    PROFILER_MAX_FILES: int = 288  # Oldest files are removed beyond this (one day at the default period)
+    
+    # OpenTelemetry tracing (needs opentelemetry-sdk): request, SQL, LLM and matching-stage spans
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "console"  # "console" (stdout), "file" (one JSON span per line) or "otlp"
+    TRACING_FILE: str = "./traces.jsonl"
+    TRACING_SERVICE_NAME: str = "neplaunch-api"
+    TRACING_SAMPLE_RATIO: float = 1.0  # Share of new traces kept; an incoming traceparent's decision wins
+    
+    # Admin endpoints are enabled only when a token is configured
+    ADMIN_TOKEN: Optional[str] = None
+    
     # Mock mode (for development without database)
     USE_MOCK_DATA: bool = False  # Set to False when database is ready (can also be set via env var)
     
+    # Replace Gemini chat calls with a local deterministic model (tests, offline dev)
+    USE_FAKE_LLM: bool = False
+    
     class Config:
         env_file = (".env", "../.env")
         case_sensitive = True
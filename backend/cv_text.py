@@ -0,0 +1,215 @@
+"""Background extraction of CV text (PDF/DOCX) feeding the 'cv' talent embedding."""
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import zipfile
+from datetime import datetime
+from multiprocessing.pool import Pool
+from typing import Optional, Set
+from xml.etree import ElementTree
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import data_versions
+from config import settings
+from database import run_with_session
+from match_index import match_index
+from matching import generate_embedding, store_embedding
+from models import CVText, Embedding, TalentProfile
+from storage import get_storage, StorageError
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction changes so cached texts are re-extracted
+EXTRACTOR_VERSION = "1"
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_XML_MAX_BYTES = 50 * 1024 * 1024  # Uncompressed document.xml; guards against zip bombs
+
+# Parsing is CPU-bound (seconds for large PDFs), so it runs in worker processes,
+# one single-task pool per CV so a parse that times out can be killed on its own
+_extract_pools: Set[Pool] = set()
+_extract_slots: Optional[asyncio.Semaphore] = None
+
+
+class UnsupportedCV(Exception):
+    """No extractor for this file type (or its optional dependency is missing)."""
+
+
+class ExtractorUnavailable(UnsupportedCV):
+    """The file type is supported but its extractor's package is not installed."""
+
+
+def _pdf_text(path: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ExtractorUnavailable("PDF extraction requires the pypdf package")
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _docx_text(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        if archive.getinfo("word/document.xml").file_size > _DOCX_XML_MAX_BYTES:
+            raise UnsupportedCV("DOCX document is too large")
+        paragraphs, current = [], []
+        with archive.open("word/document.xml") as xml:
+            for _, element in ElementTree.iterparse(xml):
+                if element.tag == f"{_WORD_NS}t" and element.text:
+                    current.append(element.text)
+                elif element.tag == f"{_WORD_NS}tab":
+                    current.append(" ")
+                elif element.tag == f"{_WORD_NS}p":
+                    paragraphs.append("".join(current))
+                    current = []
+                    element.clear()
+    return "\n".join(paragraphs)
+
+
+def normalize_text(text: str, max_chars: int) -> str:
+    text = _WHITESPACE.sub(" ", text.replace("\x00", ""))
+    text = _BLANK_LINES.sub("\n\n", text).strip()
+    return text[:max_chars]
+
+
+def extract_text(path: str, extension: str, max_chars: int) -> str:
+    """Plain text of a PDF, DOCX or TXT file. Runs in a worker process."""
+    if extension == ".pdf":
+        text = _pdf_text(path)
+    elif extension == ".docx":
+        text = _docx_text(path)
+    elif extension == ".txt":
+        with open(path, "rb") as f:
+            text = f.read(max_chars * 4).decode("utf-8", errors="ignore")
+    else:
+        raise UnsupportedCV(f"Unsupported CV type: {extension or 'none'}")
+    return normalize_text(text, max_chars)
+
+
+def _close_pool(pool: Pool):
+    # terminate() joins the pool's threads, so it runs off the event loop
+    _extract_pools.discard(pool)
+    asyncio.get_running_loop().run_in_executor(None, pool.terminate)
+
+
+async def _extract_in_process(path: str, extension: str) -> str:
+    """Run one extraction in a fresh worker process, killed if it outlives the timeout."""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def settle(outcome, value):
+        loop.call_soon_threadsafe(lambda: done.done() or outcome(value))
+
+    pool = multiprocessing.Pool(processes=1)
+    _extract_pools.add(pool)
+    try:
+        pool.apply_async(
+            extract_text, (path, extension, settings.CV_TEXT_MAX_CHARS),
+            callback=lambda text: settle(done.set_result, text),
+            error_callback=lambda e: settle(done.set_exception, e),
+        )
+        return await asyncio.wait_for(done, settings.CV_EXTRACT_TIMEOUT_SECONDS)
+    finally:
+        _close_pool(pool)
+
+
+async def _run_extract_job(path: str, extension: str) -> str:
+    global _extract_slots
+    if _extract_slots is None:
+        _extract_slots = asyncio.Semaphore(max(settings.CV_EXTRACT_WORKERS, 1))
+    async with _extract_slots:
+        if settings.CV_EXTRACT_WORKERS > 0:
+            return await _extract_in_process(path, extension)
+        future = asyncio.get_running_loop().run_in_executor(
+            None, extract_text, path, extension, settings.CV_TEXT_MAX_CHARS
+        )
+        return await asyncio.wait_for(future, settings.CV_EXTRACT_TIMEOUT_SECONDS)
+
+
+def shutdown_extract_pool():
+    """Stop the CV extraction worker processes."""
+    for pool in list(_extract_pools):
+        pool.terminate()
+    _extract_pools.clear()
+
+
+def content_sha256(cv_path: str) -> Optional[str]:
+    """Content hash encoded in a CV storage key ("cv/<sha256>.pdf"), if any."""
+    stem = os.path.splitext(os.path.basename(cv_path))[0]
+    return stem if _SHA256.match(stem) else None
+
+
+async def get_cv_text(db: AsyncSession, cv_path: str) -> str:
+    """Extracted text of a stored CV, from the cv_texts cache when the content was seen before."""
+    sha = content_sha256(cv_path)
+    if sha:
+        row = await db.get(CVText, sha)
+        if row is not None and row.extractor_version == EXTRACTOR_VERSION:
+            return row.text
+
+    extension = os.path.splitext(cv_path)[1].lower()
+    async with get_storage().local_copy(cv_path) as path:
+        text = await _run_extract_job(path, extension)
+
+    if sha:
+        await db.merge(CVText(
+            sha256=sha,
+            extractor_version=EXTRACTOR_VERSION,
+            text=text,
+            created_at=datetime.utcnow().isoformat()
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker extracted the same content concurrently
+            await db.rollback()
+    return text
+
+
+async def _remove_cv_embedding(db: AsyncSession, user_id: str):
+    await db.execute(delete(Embedding).where(Embedding.user_id == user_id, Embedding.text_source == "cv"))
+    await db.commit()
+    match_index.remove(user_id, "cv")
+
+
+async def _index_cv(db: AsyncSession, user_id: str, cv_path: str):
+    try:
+        text = await get_cv_text(db, cv_path)
+    except ExtractorUnavailable as e:
+        logger.warning("CV text extraction unavailable for %s: %s", cv_path, e)
+        text = ""
+    except (UnsupportedCV, StorageError, asyncio.TimeoutError) as e:
+        logger.info("CV text extraction skipped for %s: %s", cv_path, e)
+        text = ""
+
+    # The talent may have replaced the CV while it was being processed
+    current = await db.scalar(select(TalentProfile.cv_path).where(TalentProfile.user_id == user_id))
+    if current != cv_path:
+        return
+
+    embedding = await generate_embedding(text) if text else None
+    if embedding and any(embedding):
+        await store_embedding(db, user_id, embedding, "cv")
+    else:
+        # Don't keep matching on a previous CV's content
+        await _remove_cv_embedding(db, user_id)
+    await data_versions.bump("talent")
+
+
+async def index_cv(user_id: str, cv_path: str):
+    """Extract a talent's CV text and store its embedding under text_source 'cv'.
+
+    Meant for BackgroundTasks: it opens its own session and never raises.
+    """
+    try:
+        await run_with_session(_index_cv, user_id, cv_path)
+    except Exception:
+        logger.exception("Error indexing CV %s", cv_path)
@@ -1,10 +1,47 @@
 """Database connection and session management."""
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import event, inspect, literal, text
+from sqlalchemy.exc import CompileError, DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
+
+def _install_query_timing(engine, recorders):
+    """Time every statement and pass it to `recorders` (/metrics histograms, the query profiler, tracing)."""
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        for record in recorders:
+            record(statement, elapsed)
+
+
+def _query_recorders():
+    recorders = []
+    if settings.METRICS_ENABLED:
+        import metrics
+        recorders.append(metrics.record_query)
+    if settings.QUERY_PROFILER_ENABLED or settings.DEBUG:
+        import query_profiler
+        recorders.append(query_profiler.record_query)
+    if settings.TRACING_ENABLED:
+        import tracing
+        if tracing.setup_tracing():
+            recorders.append(tracing.record_query)
+    return recorders
+
+
 # Only create engine if not in mock mode
 if not settings.USE_MOCK_DATA:
     try:
@@ -16,6 +53,10 @@ if not settings.USE_MOCK_DATA:
             future=True,
         )
         
+        recorders = _query_recorders()
+        if recorders:
+            _install_query_timing(engine, recorders)
+        
         # Create async session factory
         AsyncSessionLocal = async_sessionmaker(
             engine,
@@ -56,18 +97,129 @@ async def get_db() -> AsyncSession:
                 await session.close()
 
 
+async def run_with_session(fn, *args, **kwargs):
+    """Run `fn(session, *args, **kwargs)` in a session it owns.
+
+    For work that may outlive the request that triggered it, such as shared
+    computations and streamed responses.
+    """
+    async with AsyncSessionLocal() as session:
+        return await fn(session, *args, **kwargs)
+
+
+async def stream_scalars(db: AsyncSession, query):
+    """Iterate ORM rows through a server-side cursor, `STREAM_BATCH_SIZE` at a time.
+
+    The connection is busy until iteration finishes, so don't issue other
+    queries on `db` from inside the loop.
+    """
+    result = await db.stream_scalars(query.execution_options(yield_per=settings.STREAM_BATCH_SIZE))
+    async for row in result:
+        yield row
+
+
+def _literal_default(column, dialect) -> Optional[str]:
+    """SQL literal for a column's scalar default, or None (no default, or one like JSON `{}` with no literal form)."""
+    if column.default is None or not column.default.is_scalar or column.default.arg is None:
+        return None
+    try:
+        return str(literal(column.default.arg, column.type).compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    except CompileError:
+        return None
+
+
+def _pending_schema_changes(conn) -> List[Tuple[str, Callable]]:
+    """Columns and indexes added to models after their table was created, as (name, apply) pairs.
+
+    create_all only creates missing tables. New columns are added nullable or
+    with their scalar default so existing rows stay valid; foreign keys on
+    added columns are not created (SQLite can't add them to an existing table).
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    changes = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            default = _literal_default(column, conn.dialect)
+            if default is not None:
+                ddl += f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            changes.append((f"column {table.name}.{column.name}", lambda c, ddl=ddl: c.execute(text(ddl))))
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                changes.append((f"index {index.name}", index.create))
+    return changes
+
+
+async def _apply_schema_changes(bind, changes: List[Tuple[str, Callable]]):
+    """Apply each change in its own transaction, so one failure doesn't skip the rest.
+
+    Workers starting together race to add the same column; the loser's error
+    is expected and only logged once the change is confirmed to be in place.
+    """
+    for name, apply in changes:
+        try:
+            async with bind.begin() as conn:
+                await conn.run_sync(apply)
+            logger.info("Added %s", name)
+        except DBAPIError as e:
+            async with bind.connect() as conn:
+                still_missing = name in dict(await conn.run_sync(_pending_schema_changes))
+            if still_missing:
+                logger.warning("Could not add %s: %s", name, e.orig)
+            else:
+                logger.info("%s was added concurrently", name)
+
+
+async def upgrade_schema(bind=None):
+    """Additive schema upgrade for tables that already exist (see _pending_schema_changes)."""
+    bind = bind or engine
+    async with bind.connect() as conn:
+        changes = await conn.run_sync(_pending_schema_changes)
+    await _apply_schema_changes(bind, changes)
+
+
 async def init_db():
     """Initialize database - create tables."""
     if settings.USE_MOCK_DATA:
         return
 
-    print(f"Initializing database: {settings.DATABASE_URL}")
+    logger.info("Initializing database: %s", engine.url.render_as_string(hide_password=True))
     try:
         async with engine.begin() as conn:
             # Create all tables - SQLAlchemy handles checking if they exist
             # but we wrap in try/except just in case of driver-specific issues
             await conn.run_sync(Base.metadata.create_all)
-        print("Database initialization complete (tables created or already exist).")
+        await upgrade_schema()
+        logger.info("Database initialization complete (tables created or already exist).")
     except Exception as e:
-        print(f"Note: Database initialization encountered an issue: {e}")
-        print("Continuing startup anyway...")
+        logger.warning("Database initialization encountered an issue: %s. Continuing startup anyway...", e)
+
+
+async def ping(timeout: float):
+    """Round-trip a trivial query; raises if the database is unreachable."""
+    async def check():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    await asyncio.wait_for(check(), timeout)
+
+
+async def prime_pool(connections: int) -> int:
+    """Open pooled connections now so the first requests don't pay for connecting."""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else connections
+    conns = await asyncio.gather(*(engine.connect() for _ in range(min(connections, size))))
+    try:
+        for conn in conns:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            await conn.close()
+    return len(conns)
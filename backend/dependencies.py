@@ -1,13 +1,17 @@
 """Dependencies for FastAPI routes."""
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from auth import decode_token, get_user_by_id
-from models import User, UserRole
+from auth import CachedUser, decode_token, get_user_by_id_cached
+from models import UserRole
 from config import settings
 from mock_data import MOCK_USERS
+from typing import Optional
+import hmac
+import logging
 
+logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 
@@ -23,14 +27,13 @@ class MockUser:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user."""
+) -> CachedUser:
+    """Dependency to get current authenticated user (id, email and role)."""
     token = credentials.credentials
-    # print(f"DEBUG: Received token: {token[:10]}...{token[-10:]}")
     payload = decode_token(token)
     
     if not payload:
-        print(f"Auth Failed: Token decode returned None")
+        logger.debug("Auth failed: token could not be decoded")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
@@ -57,7 +60,7 @@ async def get_current_user(
             "profile_data": {}
         })
     
-    user = await get_user_by_id(db, user_id)
+    user = await get_user_by_id_cached(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,3 +68,46 @@ async def get_current_user(
         )
     
     return user
+
+
+class TokenUser:
+    """User identity taken from verified token claims, without a database lookup."""
+    def __init__(self, user_id: str, role: UserRole):
+        self.id = user_id
+        self.role = role
+
+
+async def get_current_user_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
+    """Dependency for role-gated routes that only need the user's id and role.
+
+    With TRUST_TOKEN_ROLE enabled the role claim in the signed token is used
+    as-is; otherwise this falls back to get_current_user.
+    """
+    if not settings.TRUST_TOKEN_ROLE:
+        return await get_current_user(credentials, db)
+    
+    payload = decode_token(credentials.credentials)
+    if not payload or not payload.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    try:
+        role = UserRole(payload.get("role"))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+    return TokenUser(payload["sub"], role)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency that guards admin endpoints with the configured ADMIN_TOKEN."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
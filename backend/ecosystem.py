@@ -0,0 +1,240 @@
+"""Ecosystem-wide role and skill statistics and the team gap analysis built on them."""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import EcosystemStat, StartupProfile, JobPosting, InvestorProfile
+from skills import normalize_skill
+
+# Canonical team roles and the title/signal keywords that indicate them (first match wins)
+ROLE_KEYWORDS = {
+    "Technical Lead": ["cto", "technical", "tech lead", "engineer", "developer", "software", "architect"],
+    "CFO/Finance Lead": ["cfo", "finance", "financial", "accountant", "accounting", "unit economics"],
+    "Product Lead": ["product", "cpo", "pm"],
+    "Sales & Marketing Lead": ["cmo", "marketing", "sales", "growth", "business development", "go-to-market", "distribution"],
+    "Operations Lead": ["coo", "operations", "ops", "supply chain", "logistics"],
+    "Design Lead": ["design", "designer", "ux", "ui"],
+    "Data/AI Lead": ["data", "machine learning", "ml", "ai", "analytics"],
+    "CEO/Founder": ["ceo", "founder", "managing director"],
+}
+
+STAT_KEY_LENGTH = 191
+TOP_SKILL_GAPS = 5
+SKILL_DEMAND_ROWS = 200  # Most-demanded skill rows read per analysis
+
+_NON_WORD = re.compile(r"[^a-z0-9&+\-]+")
+
+
+def normalize_role(title: Optional[str]) -> Optional[str]:
+    """Map a free-text title or investor signal to a canonical role, if any."""
+    words = f" {_NON_WORD.sub(' ', (title or '').lower())} "
+    for role, keywords in ROLE_KEYWORDS.items():
+        if any(f" {keyword} " in words or f" {keyword}s " in words for keyword in keywords):
+            return role
+    return None
+
+
+def _skills(values: Optional[Iterable[str]]) -> set:
+    return {normalize_skill(v)[:STAT_KEY_LENGTH] for v in values or [] if v and normalize_skill(v)}
+
+
+def _team_roles(team_members: Optional[List[Dict]]) -> set:
+    roles = {normalize_role(m.get("role")) for m in team_members or [] if isinstance(m, dict)}
+    roles.discard(None)
+    return roles
+
+
+def startup_contribution(profile: Optional[StartupProfile]) -> Counter:
+    """Stat rows one startup profile adds to the totals."""
+    if profile is None:
+        return Counter()
+    counts = Counter({("total", "startups"): 1})
+    counts.update(("startup_role", role) for role in _team_roles(profile.team_members))
+    counts.update(("startup_skill", skill) for skill in _skills(profile.required_skills))
+    return counts
+
+
+def job_contribution(job: Optional[JobPosting]) -> Counter:
+    """Stat rows one job posting adds to the totals."""
+    if job is None:
+        return Counter()
+    counts = Counter({("total", "jobs"): 1})
+    role = normalize_role(job.title)
+    if role:
+        counts[("job_role", role)] += 1
+    counts.update(("job_skill", skill) for skill in _skills(job.required_skills))
+    return counts
+
+
+def investor_contribution(profile: Optional[InvestorProfile]) -> Counter:
+    """Stat rows one investor profile adds to the totals (roles named in key_signals)."""
+    if profile is None:
+        return Counter()
+    counts = Counter({("total", "investors"): 1})
+    roles = {normalize_role(signal) for signal in profile.key_signals or []}
+    roles.discard(None)
+    counts.update(("investor_role", role) for role in roles)
+    return counts
+
+
+def _upsert(db: AsyncSession, rows: List[Dict]):
+    """INSERT ... ON DUPLICATE KEY UPDATE occurrences = occurrences + new (or the dialect's equivalent)."""
+    if db.bind.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(EcosystemStat).values(rows)
+        return stmt.on_duplicate_key_update(occurrences=EcosystemStat.occurrences + stmt.inserted.occurrences)
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(EcosystemStat).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[EcosystemStat.kind, EcosystemStat.key],
+        set_={"occurrences": EcosystemStat.occurrences + stmt.excluded.occurrences},
+    )
+
+
+async def apply_stat_deltas(db: AsyncSession, before: Counter, after: Counter):
+    """Adjust the stats by `after - before` within the caller's transaction."""
+    rows = [
+        {"kind": kind, "key": key, "occurrences": after.get((kind, key), 0) - before.get((kind, key), 0)}
+        for kind, key in set(before) | set(after)
+    ]
+    rows = [row for row in rows if row["occurrences"]]
+    if rows:
+        await db.execute(_upsert(db, rows))
+
+
+async def rebuild_ecosystem_stats(db: AsyncSession) -> int:
+    """Recompute every stat from the profile tables (e.g. after a bulk import)."""
+    counts = Counter()
+    for model, contribution in (
+        (StartupProfile, startup_contribution),
+        (JobPosting, job_contribution),
+        (InvestorProfile, investor_contribution),
+    ):
+        result = await db.stream_scalars(select(model).execution_options(yield_per=500))
+        async for obj in result:
+            counts.update(contribution(obj))
+    await db.execute(delete(EcosystemStat))
+    if counts:
+        await db.execute(_upsert(db, [
+            {"kind": kind, "key": key, "occurrences": n} for (kind, key), n in counts.items()
+        ]))
+    await db.commit()
+    return len(counts)
+
+
+async def ensure_ecosystem_stats(db: AsyncSession):
+    """Build the stats once for databases that predate the table."""
+    result = await db.execute(select(EcosystemStat.kind).limit(1))
+    if result.first() is None:
+        await rebuild_ecosystem_stats(db)
+
+
+async def _stats(db: AsyncSession, kinds: Iterable[str], limit: Optional[int] = None) -> Counter:
+    query = select(EcosystemStat.kind, EcosystemStat.key, EcosystemStat.occurrences).where(
+        EcosystemStat.kind.in_(list(kinds)), EcosystemStat.occurrences > 0
+    )
+    if limit is not None:
+        query = query.order_by(EcosystemStat.occurrences.desc()).limit(limit)
+    result = await db.execute(query)
+    return Counter({(kind, key): n for kind, key, n in result.all()})
+
+
+def _impact(score: float) -> Optional[str]:
+    if score >= 0.5:
+        return "Critical"
+    if score >= 0.3:
+        return "High"
+    if score >= 0.15:
+        return "Medium"
+    return None
+
+
+async def analyze_team_gaps(db: AsyncSession, profile: StartupProfile) -> Dict:
+    """Compare a startup's team, skills and open roles with ecosystem-wide demand.
+
+    Roles are weighted by how often investors ask for them in their key
+    signals and how common they are on other startups' teams; skills by how
+    often other startups and job postings require them.
+    """
+    result = await db.execute(
+        select(JobPosting.title, JobPosting.required_skills).where(JobPosting.startup_id == profile.id)
+    )
+    jobs = result.all()
+    team_roles = _team_roles(profile.team_members)
+    open_roles = {normalize_role(title) for title, _ in jobs} - {None}
+    own_skills = _skills(profile.required_skills) | _skills(profile.tech_stack)
+    for _, job_skills in jobs:
+        own_skills |= _skills(job_skills)
+
+    stats = await _stats(db, ["total", "startup_role", "investor_role", "job_role"])
+    startups = max(stats[("total", "startups")], 1)
+    investors = stats[("total", "investors")]
+
+    role_scores = {}
+    for role in ROLE_KEYWORDS:
+        prevalence = stats[("startup_role", role)] / startups
+        investor_weight = stats[("investor_role", role)] / investors if investors else 0.0
+        role_scores[role] = (0.6 * investor_weight + 0.4 * prevalence, prevalence, investor_weight)
+
+    gaps = []
+    for role, (score, prevalence, investor_weight) in sorted(role_scores.items(), key=lambda kv: -kv[1][0]):
+        impact = _impact(score)
+        if role in team_roles or impact is None:
+            continue
+        reasons = []
+        if investor_weight:
+            reasons.append(f"{round(investor_weight * 100)}% of investors look for this in their key signals")
+        if prevalence:
+            reasons.append(f"{round(prevalence * 100)}% of startups have one on the team")
+        if stats[("job_role", role)]:
+            reasons.append(f"{stats[('job_role', role)]} open postings across startups")
+        gaps.append({
+            "role": role,
+            "impact": impact,
+            "reason": "; ".join(reasons),
+            "recommended_action": (
+                f"Keep recruiting: you already have an open {role} posting"
+                if role in open_roles else f"Post a role for {role}"
+            ),
+        })
+
+    # Skill demand across the ecosystem, excluding what this startup already covers
+    skill_demand = await _stats(db, ["startup_skill", "job_skill"], limit=SKILL_DEMAND_ROWS)
+    demand = Counter()
+    for (_, skill), n in skill_demand.items():
+        demand[skill] += n
+    skill_gaps = [
+        {"skill": skill, "demand": n}
+        for skill, n in demand.most_common()
+        if skill not in own_skills
+    ][:TOP_SKILL_GAPS]
+
+    # Readiness: share of investor-weighted roles covered, blended with profile completeness
+    total_weight = sum(score for score, _, _ in role_scores.values())
+    covered = sum(role_scores[role][0] for role in team_roles if role in role_scores)
+    coverage = covered / total_weight if total_weight else 0.0
+    readiness = round(70 * coverage + 0.3 * min(profile.completeness_score or 0.0, 100.0))
+
+    recommendations = [
+        f"Add a {gap['role']} to close a {gap['impact'].lower()}-impact gap" for gap in gaps[:3]
+    ]
+    if skill_gaps:
+        recommendations.append(
+            "Consider skills in high demand across the ecosystem: "
+            + ", ".join(gap["skill"] for gap in skill_gaps[:3])
+        )
+
+    return {
+        "gaps": gaps,
+        "skill_gaps": skill_gaps,
+        "investor_readiness_score": readiness,
+        "recommendations": recommendations,
+        "sample_size": {"startups": stats[("total", "startups")], "investors": investors,
+                        "jobs": stats[("total", "jobs")]},
+    }
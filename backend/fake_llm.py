@@ -0,0 +1,44 @@
+"""Local stand-in for the Gemini chat model (no network, deterministic output)."""
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+DEFAULT_FEEDBACK = {
+    "market_size_score": 6,
+    "market_size_feedback": "The addressable market in Nepal is modest; show a path to regional expansion.",
+    "team_market_fit_score": 7,
+    "team_market_fit_feedback": "The founders know the local market, but distribution experience is thin.",
+    "traction_narrative_score": 5,
+    "traction_narrative_feedback": "Quote monthly growth and retention instead of cumulative signups.",
+    "defensibility_score": 4,
+    "defensibility_feedback": "Local partnerships help, but the product itself is easy to copy.",
+    "overall_assessment": "Promising early-stage pitch that needs sharper traction evidence.",
+    "suggestions": ["Add unit economics", "Name the first three hires", "Size the Kathmandu valley market"],
+}
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChatModel:
+    """Mimics the `ainvoke`/`astream` surface of LangChain chat models.
+
+    The response is a fenced JSON block (like Gemini tends to return), streamed
+    in `chunk_size`-character pieces with `delay` seconds between them.
+    """
+
+    def __init__(self, response: Optional[dict] = None, chunk_size: int = 24, delay: float = 0.01):
+        self.response_text = "```json\n" + json.dumps(response or DEFAULT_FEEDBACK, indent=2) + "\n```"
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    async def ainvoke(self, messages) -> FakeMessage:
+        await asyncio.sleep(self.delay)
+        return FakeMessage(self.response_text)
+
+    async def astream(self, messages) -> AsyncIterator[FakeMessage]:
+        for i in range(0, len(self.response_text), self.chunk_size):
+            await asyncio.sleep(self.delay)
+            yield FakeMessage(self.response_text[i:i + self.chunk_size])
@@ -0,0 +1,44 @@
+"""Conditional GET support (ETag / If-None-Match)."""
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response
+
+# Responses are per-user, so only the browser may keep them, and it must revalidate
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the values a response is derived from."""
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def set_etag(response: Response, etag: str):
+    response.headers.update(etag_headers(etag))
@@ -0,0 +1,89 @@
+"""Gemini clients, created on first use (or by `warmup`) to keep langchain out of cold start."""
+import asyncio
+import threading
+import time
+
+from config import settings
+from llm_gateway import llm_gateway, gemini_client_kwargs
+
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+PITCH_MODEL = "gemini-1.5-flash"
+
+llm_gateway.configure(
+    EMBEDDING_MODEL,
+    concurrency=settings.LLM_EMBEDDING_CONCURRENCY,
+    rpm=settings.LLM_EMBEDDING_RPM,
+)
+llm_gateway.configure(PITCH_MODEL, concurrency=settings.LLM_CHAT_CONCURRENCY, rpm=settings.LLM_CHAT_RPM)
+
+_lock = threading.Lock()
+_clients = {}
+
+
+def _get(name: str, build):
+    if name not in _clients:
+        with _lock:
+            if name not in _clients:
+                _clients[name] = build()
+    return _clients[name]
+
+
+async def _aget(name: str, build):
+    # The first build imports langchain (over a second); keep that off the event loop
+    if name in _clients:
+        return _clients[name]
+    return await asyncio.to_thread(_get, name, build)
+
+
+def _build_embedder():
+    if not settings.GOOGLE_API_KEY:
+        return None
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY,
+        **gemini_client_kwargs()
+    )
+
+
+def _build_chat_model():
+    if settings.USE_FAKE_LLM:
+        from fake_llm import FakeChatModel
+        return FakeChatModel()
+    if not settings.GOOGLE_API_KEY:
+        return None
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=PITCH_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY,
+        **gemini_client_kwargs()
+    )
+
+
+def get_embedder():
+    """Embedding client, or None when no API key is configured."""
+    return _get("embedder", _build_embedder)
+
+
+def get_chat_model():
+    """Chat model for pitch feedback (the fake model with USE_FAKE_LLM), or None."""
+    return _get("chat_model", _build_chat_model)
+
+
+async def aget_embedder():
+    return await _aget("embedder", _build_embedder)
+
+
+async def aget_chat_model():
+    return await _aget("chat_model", _build_chat_model)
+
+
+def warmup() -> float:
+    """Import langchain and build both clients now; returns the seconds spent.
+
+    Blocking, so run it in a thread when called from the event loop.
+    """
+    started = time.perf_counter()
+    get_embedder()
+    get_chat_model()
+    return time.perf_counter() - started
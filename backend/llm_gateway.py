@@ -0,0 +1,245 @@
+"""Shared rate-limited gateway for calls to hosted LLM and embedding models."""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import tracing
+from config import settings
+from metrics import LLM_CALL_ERRORS, LLM_CALL_SECONDS, LLM_QUEUE_WAIT_SECONDS
+
+# Lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class GatewayRejected(Exception):
+    """A call was not admitted: the queue was full or its deadline could not be met."""
+
+    def __init__(self, model: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{model}: {reason}")
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Requests-per-minute budget; `rpm` of 0 disables the limit.
+
+    The burst is capped at ten seconds' worth of requests so a full bucket
+    cannot spend a whole minute's quota at once.
+    """
+
+    def __init__(self, rpm: int):
+        self.rate = rpm / 60.0
+        self.capacity = max(1.0, rpm / 6.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        if not self.rate:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until(self, n: float = 1.0) -> float:
+        """Time until `n` more tokens are available."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        return max(0.0, (n - self.tokens) / self.rate)
+
+
+class ModelLane:
+    """Priority queue, concurrency limit and RPM budget for one model."""
+
+    def __init__(self, model: str, concurrency: int, rpm: int, max_queue: int):
+        self.model = model
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.bucket = TokenBucket(rpm)
+        self.in_flight = 0
+        self.queued = 0
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.counters = {
+            "admitted": 0, "completed": 0, "failed": 0,
+            "rejected_queue_full": 0, "rejected_deadline": 0,
+        }
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.call_seconds = 0.0
+
+    def _estimated_wait(self, priority: int = BACKGROUND) -> float:
+        """Rough time until a new call at `priority` would start (RPM-bound part only)."""
+        ahead = sum(1 for entry in self._heap if entry[0] <= priority and not entry[2].done())
+        return self.bucket.seconds_until(ahead + 1)
+
+    def _dispatch(self):
+        while self._heap and self.in_flight < self.concurrency:
+            if self._heap[0][2].done():  # Cancelled or timed out while waiting
+                heapq.heappop(self._heap)
+                continue
+            if not self.bucket.try_take():
+                self._schedule(self.bucket.seconds_until())
+                return
+            _, _, future = heapq.heappop(self._heap)
+            self.queued -= 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = loop.call_later(delay, fire)
+
+    async def acquire(self, priority: int, timeout: Optional[float]):
+        if self.queued >= self.max_queue:
+            self.counters["rejected_queue_full"] += 1
+            raise GatewayRejected(self.model, "queue full", retry_after=max(1.0, self._estimated_wait()))
+        if timeout is not None:
+            estimate = self._estimated_wait(priority)
+            if estimate > timeout:
+                self.counters["rejected_deadline"] += 1
+                raise GatewayRejected(self.model, "deadline cannot be met", retry_after=estimate)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, [priority, next(self._seq), future])
+        self.queued += 1
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            # Shield so a timeout doesn't race a slot being granted at the same moment
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.queued -= 1
+                self.counters["rejected_deadline"] += 1
+                raise GatewayRejected(self.model, "deadline exceeded while queued") from None
+            # Granted right at the deadline; go ahead
+        except asyncio.CancelledError:
+            if future.done():
+                self.release()
+            else:
+                future.cancel()
+                self.queued -= 1
+            raise
+        waited = time.monotonic() - started
+        self.counters["admitted"] += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        LLM_QUEUE_WAIT_SECONDS.labels(self.model).observe(waited)
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = self.counters["admitted"]
+        finished = self.counters["completed"] + self.counters["failed"]
+        return {
+            "concurrency": self.concurrency,
+            "rpm": round(self.bucket.rate * 60),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            **self.counters,
+            "avg_wait_ms": round(self.wait_seconds / admitted * 1000, 1) if admitted else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+            "avg_call_ms": round(self.call_seconds / finished * 1000, 1) if finished else 0.0,
+        }
+
+
+class LLMGateway:
+    """Admission control for model calls, shared by every request in the process.
+
+    Each model gets its own lane with a concurrency limit, an RPM budget and a
+    bounded priority queue. Calls that cannot start before their deadline are
+    rejected with `GatewayRejected` instead of piling up behind the limit.
+
+    Priority only orders calls within one lane. Chat (interactive) and
+    embedding (background) calls use different models and therefore
+    different lanes, so they never compete for the same slots.
+    """
+
+    def __init__(self, concurrency: int, rpm: int, max_queue: int):
+        self.defaults = {"concurrency": concurrency, "rpm": rpm, "max_queue": max_queue}
+        self._lanes: Dict[str, ModelLane] = {}
+
+    def configure(self, model: str, concurrency: Optional[int] = None, rpm: Optional[int] = None,
+                  max_queue: Optional[int] = None):
+        """Set limits for `model` (unset values use the gateway defaults)."""
+        limits = {**self.defaults}
+        for name, value in (("concurrency", concurrency), ("rpm", rpm), ("max_queue", max_queue)):
+            if value is not None:
+                limits[name] = value
+        self._lanes[model] = ModelLane(model, **limits)
+
+    def lane(self, model: str) -> ModelLane:
+        if model not in self._lanes:
+            self.configure(model)
+        return self._lanes[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = INTERACTIVE, timeout: Optional[float] = None):
+        """Hold one admitted call for the duration of the block (e.g. a whole stream)."""
+        lane = self.lane(model)
+        with tracing.span(f"llm {model}", {"llm.model": model, "llm.priority": priority}):
+            await lane.acquire(priority, timeout)
+            tracing.add_event("admitted")
+            started = time.monotonic()
+            outcome = "error"
+            try:
+                yield
+            except BaseException as e:
+                lane.counters["failed"] += 1
+                LLM_CALL_ERRORS.labels(model, type(e).__name__).inc()
+                raise
+            else:
+                lane.counters["completed"] += 1
+                outcome = "ok"
+            finally:
+                elapsed = time.monotonic() - started
+                lane.call_seconds += elapsed
+                LLM_CALL_SECONDS.labels(model, outcome).observe(elapsed)
+                lane.release()
+
+    async def call(self, model: str, fn: Callable[[], Awaitable[Any]], priority: int = INTERACTIVE,
+                   timeout: Optional[float] = None):
+        """Run `fn()` once admitted for `model`."""
+        async with self.slot(model, priority, timeout):
+            return await fn()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {model: lane.stats() for model, lane in self._lanes.items()}
+
+
+def gemini_client_kwargs() -> Dict[str, Any]:
+    """Extra LangChain Gemini client arguments (a custom endpoint for stub servers)."""
+    if not settings.GEMINI_API_ENDPOINT:
+        return {}
+    return {"client_options": {"api_endpoint": settings.GEMINI_API_ENDPOINT}, "transport": "rest"}
+
+
+llm_gateway = LLMGateway(
+    concurrency=settings.LLM_DEFAULT_CONCURRENCY,
+    rpm=settings.LLM_DEFAULT_RPM,
+    max_queue=settings.LLM_MAX_QUEUE,
+)
@@ -0,0 +1,121 @@
+"""Structured logging: JSON records, a background writer thread, per-logger sampling and request ids."""
+import atexit
+import copy
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+import orjson
+
+from config import settings
+
+# Set per request by RequestIdMiddleware; "-" outside a request
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+# LogRecord attributes that aren't user-supplied `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (runs in the logging thread's caller)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a share of the sub-WARNING records of chosen loggers (and their children)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so "matching.scores" overrides "matching"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return random.random() < rate
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback here, but leave the formatting to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the level, logger, request id and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+
+def setup_logging():
+    """Route all logging through a queue to a writer thread. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    sink = logging.StreamHandler(sys.stdout)
+    sink.setFormatter(JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    # Unbounded: a slow stdout delays log output, never a request
+    handler = _NonBlockingQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    # Uvicorn installs its own stream handlers; send its records through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(handler.queue, sink, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
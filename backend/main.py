@@ -1,11 +1,40 @@
 """Main FastAPI application.""" 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_db
+from fastapi.responses import ORJSONResponse
+from database import init_db, run_with_session, prime_pool, ping
+from ecosystem import ensure_ecosystem_stats
+from match_index import match_index
+from auth import shutdown_hash_pool
+from cv_text import shutdown_extract_pool
+from llm_clients import warmup
+from readiness import readiness
 from config import settings
+from middleware import (
+    CompressionMiddleware, BodySizeLimitMiddleware, MetricsMiddleware, QueryProfilerMiddleware, RequestIdMiddleware,
+    SamplingProfilerMiddleware, TracingMiddleware,
+)
+from metrics import render_metrics
+from logging_config import setup_logging, stop_logging
+from sampling_profiler import start_periodic_profiler, stop_periodic_profiler
+from tracing import setup_tracing, shutdown_tracing
+import asyncio
+import hmac
+import logging
 import uvicorn
 
-app = FastAPI(title="NepLaunch API", version="1.0.0")
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# orjson encodes large match/listing payloads several times faster than the stdlib
+app = FastAPI(title="NepLaunch API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Refuse oversized uploads before the multipart body is read (allowance for form overhead).
+# Added before CORS so CORS wraps it and browsers can read the 413.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/talent/upload-cv": settings.CV_MAX_BYTES + 64 * 1024},
+)
 
 # CORS
 app.add_middleware(
@@ -16,9 +45,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression (streaming responses pass through uncompressed)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
+
+# Per-request SQL profile: N+1 warnings, plus X-DB-Query-Count / X-DB-Time headers in debug mode
+if settings.QUERY_PROFILER_ENABLED or settings.DEBUG:
+    app.add_middleware(
+        QueryProfilerMiddleware,
+        repeat_threshold=settings.QUERY_PROFILER_REPEAT_THRESHOLD,
+        headers=settings.DEBUG,
+    )
+
+# Admin-only per-request stack sampling (?profile=1); covers routing and the middleware inside it
+if settings.PROFILER_ENABLED and settings.ADMIN_TOKEN:
+    app.add_middleware(
+        SamplingProfilerMiddleware,
+        admin_token=settings.ADMIN_TOKEN,
+        interval=settings.PROFILER_REQUEST_INTERVAL_MS / 1000,
+    )
+
+# Request spans with SQL, LLM and matching-stage children (needs opentelemetry-sdk)
+if setup_tracing():
+    app.add_middleware(TracingMiddleware)
+
+# Outermost, so latency includes compression and every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Request ids for log correlation (echoed as X-Request-ID); outermost so every log line has one
+app.add_middleware(RequestIdMiddleware)
+
 
 # Include routers
-from routers import auth, founders, talent, investors, matches, ai
+from routers import auth, founders, talent, investors, matches, ai, admin, files
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(founders.router, prefix="/founders", tags=["founders"])
@@ -26,18 +91,66 @@ app.include_router(talent.router, prefix="/talent", tags=["talent"])
 app.include_router(investors.router, prefix="/investors", tags=["investors"])
 app.include_router(matches.router, prefix="/matches", tags=["matches"])
 app.include_router(ai.router, prefix="/ai", tags=["ai"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(files.router, prefix="/files", tags=["files"])
+
+
+async def _init_db():
+    await init_db()
+    # init_db reports problems instead of raising; fail the phase if the DB is still unreachable
+    await ping(settings.READINESS_DB_TIMEOUT_SECONDS)
+
+
+async def _prime_pool():
+    return {"connections": await prime_pool(settings.DB_POOL_PRIME_CONNECTIONS)}
+
+
+async def _load_match_index():
+    await run_with_session(match_index.load)
+    return match_index.stats()
+
+
+async def _warmup_llm_clients():
+    return {"seconds": round(await asyncio.get_running_loop().run_in_executor(None, warmup), 3)}
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
-    from config import settings
+    """Start the startup phases in the background; /readyz reports when they are done."""
+    stages = []
     if not settings.USE_MOCK_DATA:
-        await init_db()
+        stages.append([("init_db", _init_db)])
+        stages.append([
+            ("db_pool", _prime_pool),
+            ("ecosystem_stats", lambda: run_with_session(ensure_ecosystem_stats)),
+            ("match_index", _load_match_index),
+        ])
     else:
-        print("Running in MOCK DATA mode - no database required!")
-        print("Login with: founder@neplaunch.com / talent@neplaunch.com / investor@neplaunch.com")
-        print("Password: password123")
+        logger.info("Running in MOCK DATA mode - no database required!")
+        logger.info("Login with: founder@neplaunch.com / talent@neplaunch.com / investor@neplaunch.com")
+        logger.info("Password: password123")
+    if settings.LLM_WARMUP_ON_STARTUP:
+        # Langchain loads in a worker thread while /livez already answers
+        stages.append([("llm_clients", _warmup_llm_clients)])
+    readiness.start(stages, retry_seconds=settings.STARTUP_RETRY_SECONDS)
+    if settings.PROFILER_PERIODIC_ENABLED:
+        start_periodic_profiler(
+            settings.PROFILER_PERIODIC_INTERVAL_MS / 1000,
+            settings.PROFILER_FLUSH_SECONDS,
+            settings.PROFILER_OUTPUT_DIR,
+            settings.PROFILER_MAX_FILES,
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker pools."""
+    readiness.stop()
+    shutdown_hash_pool()
+    shutdown_extract_pool()
+    stop_periodic_profiler()
+    shutdown_tracing()
+    stop_logging()
 
 
 @app.get("/")
@@ -50,5 +163,40 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/livez")
+async def livez():
+    """Liveness: the process is up and the event loop is responsive."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: startup phases finished and the database answers. 503 otherwise."""
+    body = readiness.snapshot()
+    if not readiness.ready:
+        return ORJSONResponse({"status": "starting", **body}, status_code=503)
+    if not settings.USE_MOCK_DATA:
+        try:
+            await ping(settings.READINESS_DB_TIMEOUT_SECONDS)
+        except Exception as e:
+            return ORJSONResponse(
+                {"status": "unavailable", "database": f"{type(e).__name__}: {e}", **body}, status_code=503
+            )
+    return {"status": "ready", **body}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics (text exposition format)."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=403, detail="Access denied")
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,190 @@
+"""In-memory index of profile and job embeddings used by the matching engine."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import Embedding
+
+# Re-read rows written this long before the newest one seen, in case writers' clocks disagree
+_CLOCK_SKEW = timedelta(seconds=60)
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    """Return a float32 unit vector (zero vectors stay zero)."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+class MatchIndex:
+    """Normalized embeddings keyed by (user_id, text_source) and by job id.
+
+    Vectors are stored unit-length so cosine similarity is a dot product, and
+    job vectors are stacked into one matrix so a talent can be scored against
+    every job with a single matrix product.
+
+    Other workers and replicas write embeddings too, so at most every
+    `refresh_seconds` the index compares the table's row count and newest
+    created_at with what it has seen, re-reads recently written rows when they
+    changed, and rebuilds from scratch when rows were deleted.
+    """
+
+    def __init__(self, refresh_seconds: float = 5.0):
+        self.refresh_seconds = refresh_seconds
+        self._profiles: Dict[Tuple[str, str], np.ndarray] = {}
+        self._jobs: Dict[str, np.ndarray] = {}
+        self._job_rows: Dict[str, int] = {}
+        self._job_matrix: Optional[np.ndarray] = None
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        # Embeddings rows read from the database: (user_id, text_source, job_id)
+        self._row_keys: Set[Tuple[str, str, Optional[str]]] = set()
+        self._signature: Tuple[int, Optional[str]] = (0, None)
+        self._next_check = 0.0
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """Load all stored embeddings on first use, then pick up other processes' writes."""
+        if self.loaded and time.monotonic() < self._next_check:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.load(db)
+            elif time.monotonic() >= self._next_check:
+                await self._refresh(db)
+
+    @staticmethod
+    async def _table_signature(db: AsyncSession) -> Tuple[int, Optional[str]]:
+        count, newest = (await db.execute(select(func.count(), func.max(Embedding.created_at)))).one()
+        return count, newest
+
+    @staticmethod
+    async def _rows(db: AsyncSession, since: Optional[str] = None):
+        query = select(Embedding.user_id, Embedding.text_source, Embedding.job_id, Embedding.embedding)
+        if since is not None:
+            query = query.where(Embedding.created_at >= since)
+        return (await db.execute(query)).all()
+
+    def _apply(self, rows) -> int:
+        """Put rows into the index; returns how many were not seen before."""
+        new = 0
+        for user_id, text_source, job_id, vector in rows:
+            key = (str(user_id), text_source, str(job_id) if job_id else None)
+            if key not in self._row_keys:
+                self._row_keys.add(key)
+                new += 1
+            self.put(user_id, text_source, vector, job_id=job_id)
+        return new
+
+    async def load(self, db: AsyncSession):
+        """(Re)build the index from the embeddings table."""
+        # Read the signature first: rows written during the load show up as a change next time
+        signature = await self._table_signature(db)
+        rows = await self._rows(db)
+        self._profiles = {}
+        self._jobs = {}
+        self._job_matrix = None
+        self._row_keys = set()
+        self._apply(rows)
+        self._signature = signature
+        self._next_check = time.monotonic() + self.refresh_seconds
+        self.loaded = True
+
+    async def _refresh(self, db: AsyncSession):
+        self._next_check = time.monotonic() + self.refresh_seconds
+        signature = await self._table_signature(db)
+        if signature == self._signature:
+            return
+        count, newest = self._signature
+        if newest is None:
+            await self.load(db)
+            return
+        try:
+            since = (datetime.fromisoformat(newest) - _CLOCK_SKEW).isoformat()
+        except ValueError:
+            await self.load(db)
+            return
+        added = self._apply(await self._rows(db, since))
+        if signature[0] != count + added:
+            # Rows were deleted (or written with an old timestamp): start over
+            await self.load(db)
+            return
+        self._signature = signature
+
+    def put(self, user_id: str, text_source: str, vector: List[float], job_id: Optional[str] = None):
+        """Insert or replace a vector after it was written to the database."""
+        if not isinstance(vector, list):
+            return
+        if job_id:
+            self._jobs[str(job_id)] = _unit(vector)
+            self._job_matrix = None
+        else:
+            self._profiles[(str(user_id), text_source)] = _unit(vector)
+
+    def remove_job(self, job_id: str):
+        """Drop a deleted job's vector."""
+        if self._jobs.pop(str(job_id), None) is not None:
+            self._job_matrix = None
+
+    def remove(self, user_id: str, text_source: str):
+        self._profiles.pop((str(user_id), text_source), None)
+
+    def get(self, user_id: str, text_source: str) -> Optional[np.ndarray]:
+        return self._profiles.get((str(user_id), text_source))
+
+    def blend(self, user_id: str, weights: Dict[str, float]) -> Optional[np.ndarray]:
+        """Weighted unit-length combination of a user's vectors from several text sources.
+
+        Sources without a vector are skipped, so a single present vector is
+        returned unchanged.
+        """
+        parts = [
+            (weight, vector) for source, weight in weights.items()
+            if weight > 0 and (vector := self.get(user_id, source)) is not None
+        ]
+        if not parts:
+            return None
+        first = parts[0][1]
+        if len(parts) == 1 or any(vector.shape != first.shape for _, vector in parts):
+            return first
+        return _unit(sum(weight * vector for weight, vector in parts))
+
+    def get_job(self, job_id: str) -> Optional[np.ndarray]:
+        return self._jobs.get(str(job_id))
+
+    def stats(self) -> Dict[str, int]:
+        return {"profiles": len(self._profiles), "jobs": len(self._jobs)}
+
+    def _matrix(self) -> np.ndarray:
+        if self._job_matrix is None:
+            ids = list(self._jobs)
+            self._job_rows = {job_id: row for row, job_id in enumerate(ids)}
+            self._job_matrix = (
+                np.vstack([self._jobs[job_id] for job_id in ids]) if ids else np.zeros((0, 0), dtype=np.float32)
+            )
+        return self._job_matrix
+
+    def job_similarities(self, query: np.ndarray, job_ids: Sequence[str]) -> List[Optional[float]]:
+        """Cosine similarity of `query` against each job; None for jobs without a vector."""
+        matrix = self._matrix()
+        rows = [self._job_rows.get(str(job_id)) for job_id in job_ids]
+        present = [row for row in rows if row is not None]
+        if not present or matrix.shape[1] != query.shape[0]:
+            return [None] * len(rows)
+        scores = iter((matrix[present] @ query).tolist())
+        return [next(scores) if row is not None else None for row in rows]
+
+
+def similarity(v1: Optional[np.ndarray], v2: Optional[np.ndarray]) -> float:
+    """Cosine similarity of two unit vectors from the index."""
+    if v1 is None or v2 is None or v1.shape != v2.shape:
+        return 0.0
+    return float(v1 @ v2)
+
+
+match_index = MatchIndex(refresh_seconds=settings.MATCH_INDEX_REFRESH_SECONDS)
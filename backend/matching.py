@@ -1,18 +1,23 @@
 """Hybrid matching engine - keyword + semantic matching."""
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
+from sqlalchemy import select, delete, func, text, or_, and_
 from sqlalchemy.orm import selectinload
-from models import User, TalentProfile, StartupProfile, InvestorProfile, Embedding, UserRole
+from models import User, TalentProfile, StartupProfile, InvestorProfile, Embedding, UserRole, FundingStage
 from typing import List, Dict, Optional
 from config import settings
+from skills import vocabulary, encode_skills, jaccard_bits, jaccard_many
+from match_index import match_index, similarity
+from llm_gateway import llm_gateway, BACKGROUND
+from llm_clients import EMBEDDING_MODEL, aget_embedder
+from metrics import EMBEDDING_ERRORS, EMBEDDING_SECONDS
+import tracing
 from datetime import datetime
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 import asyncio
+import logging
+import re
+import time
 
-embedder = GoogleGenerativeAIEmbeddings(
-    model="models/gemini-embedding-001",
-    google_api_key=settings.GOOGLE_API_KEY
-) if settings.GOOGLE_API_KEY else None
+logger = logging.getLogger(__name__)
 
 
 def cosine_similarity(v1: List[float], v2: List[float]) -> float:
@@ -30,39 +35,60 @@ def cosine_similarity(v1: List[float], v2: List[float]) -> float:
     return dot_product / (magnitude_v1 * magnitude_v2)
 
 
-async def generate_embedding(text: str) -> List[float]:
-    """Generate embedding using Google Gemini gemini-embedding-001."""
+async def generate_embedding(text: str) -> Optional[List[float]]:
+    """Generate embedding using Google Gemini gemini-embedding-001.
+
+    Returns None when the call fails or the gateway rejects it, so callers
+    keep the previously stored vector instead of overwriting it with zeros.
+    """
     # gemini-embedding-001 output dimension is 768
     EMBEDDING_DIM = 768
 
-    if not text or not embedder:
+    embedder = await aget_embedder() if text else None
+    if not embedder:
         return [0.0] * EMBEDDING_DIM
 
+    started = time.perf_counter()
     try:
         # LangChain's embedder is sync — run in thread to keep async safe
         # use embed_query for single string to avoid batching overhead if possible, 
         # though embed_documents works too.
-        vector = await asyncio.get_event_loop().run_in_executor(
-            None,
-            embedder.embed_query,
-            text
-        )
+        # Embeddings are background work: they queue behind interactive calls
+        with tracing.span("generate_embedding", {"text.length": len(text)}):
+            vector = await llm_gateway.call(
+                EMBEDDING_MODEL,
+                lambda: asyncio.get_event_loop().run_in_executor(None, embedder.embed_query, text),
+                priority=BACKGROUND,
+                timeout=settings.LLM_BACKGROUND_TIMEOUT_SECONDS,
+            )
+        EMBEDDING_SECONDS.labels("ok").observe(time.perf_counter() - started)
         return vector
     except Exception as e:
-        print(f"Error generating embedding: {e}")
-        return [0.0] * EMBEDDING_DIM
+        logger.warning("Embedding failed, keeping the stored vector: %s", e)
+        EMBEDDING_SECONDS.labels("error").observe(time.perf_counter() - started)
+        EMBEDDING_ERRORS.labels(type(e).__name__).inc()
+        return None
 
 
-async def store_embedding(db: AsyncSession, user_id: str, embedding: List[float], text_source: str):
-    """Store or update embedding for a user."""
-    from models import Embedding
-    from uuid import UUID
-    
+async def store_embedding(
+    db: AsyncSession,
+    user_id: str,
+    embedding: Optional[List[float]],
+    text_source: str,
+    job_id: Optional[str] = None
+):
+    """Store or update embedding for a user (or one of their job postings).
+
+    A None embedding (generation failed) leaves the stored one untouched.
+    """
+    if embedding is None:
+        return
     # Check if embedding exists
     result = await db.execute(
         select(Embedding).where(
             Embedding.user_id == user_id,
-            Embedding.text_source == text_source
+            Embedding.text_source == text_source,
+            Embedding.job_id == job_id if job_id else Embedding.job_id.is_(None)
         )
     )
     existing = result.scalars().first()
@@ -73,6 +99,7 @@ async def store_embedding(db: AsyncSession, user_id: str, embedding: List[float]
     else:
         new_embedding = Embedding(
             user_id=user_id,
+            job_id=job_id,
             embedding=embedding,
             text_source=text_source,
             created_at=datetime.utcnow().isoformat()
@@ -80,6 +107,24 @@ async def store_embedding(db: AsyncSession, user_id: str, embedding: List[float]
         db.add(new_embedding)
     
     await db.commit()
+    match_index.put(user_id, text_source, embedding, job_id=job_id)
+
+
+async def delete_job_embedding(db: AsyncSession, job_id: str):
+    """Remove a job posting's embedding (call before deleting the job)."""
+    await db.execute(delete(Embedding).where(Embedding.job_id == job_id))
+    match_index.remove_job(job_id)
+
+
+def blended_talent_vector(user_id: str):
+    """Index vector for a talent: the profile text blended with their CV text when one was indexed."""
+    weight = settings.CV_EMBEDDING_WEIGHT
+    return match_index.blend(str(user_id), {"profile": 1.0 - weight, "cv": weight})
+
+
+def job_embedding_text(job) -> str:
+    """Text embedded for a job posting."""
+    return f"{job.title or ''} {job.description or ''} {job.requirements or ''} {' '.join(job.required_skills or [])}"
 
 
 def calculate_jaccard_similarity(set1: List[str], set2: List[str]) -> float:
@@ -103,93 +148,89 @@ async def match_talent_to_startup(
     db: AsyncSession,
     talent_id: str,
     startup_id: str,
-    job_id: Optional[str] = None
+    job_id: Optional[str] = None,
+    talent: Optional[TalentProfile] = None,
+    startup: Optional[StartupProfile] = None,
+    job=None
 ) -> Dict:
-    """Match talent to a startup role using hybrid scoring."""
-    from uuid import UUID
+    """Match talent to a startup role using hybrid scoring.
+
+    Callers that already loaded the profiles (and the job) can pass them to
+    skip the lookups; with the match index loaded no query is issued at all.
+    """
     from models import JobPosting
     
     # Get talent profile
-    talent_result = await db.execute(
-        select(TalentProfile).where(TalentProfile.user_id == talent_id)
-    )
-    talent = talent_result.scalars().first()
+    if talent is None:
+        talent_result = await db.execute(
+            select(TalentProfile).where(TalentProfile.user_id == talent_id)
+        )
+        talent = talent_result.scalars().first()
     
     # Get startup profile
-    startup_result = await db.execute(
-        select(StartupProfile).where(StartupProfile.user_id == startup_id)
-    )
-    startup = startup_result.scalars().first()
+    if startup is None:
+        startup_result = await db.execute(
+            select(StartupProfile).where(StartupProfile.user_id == startup_id)
+        )
+        startup = startup_result.scalars().first()
     
     if not talent or not startup:
         return {"error": "Profile not found"}
     
     # Score A: Keyword Match (60%)
-    talent_skills = []
-    for s in (talent.skills or []):
-        if isinstance(s, dict):
-            talent_skills.append(s.get("name", "").lower())
-        elif isinstance(s, str):
-            talent_skills.append(s.lower())
-    
-    # Use job-specific skills if job_id is provided, else use startup general skills
-    required_skills = [s.lower() for s in (startup.required_skills or [])]
+    # Skills are compared as bitsets over the shared skill vocabulary so that
+    # synonyms ("js"/"javascript") count as the same skill.
+    talent_bits = encode_skills(talent.skills)
+    required_bits = encode_skills(startup.required_skills)
     
     # Also include tech stack in the keyword pool for general startup matching
-    startup_keywords = list(required_skills)
-    if startup.tech_stack:
-        startup_keywords.extend([s.lower() for s in startup.tech_stack])
+    startup_bits = required_bits | encode_skills(startup.tech_stack)
     
+    # Use job-specific skills if job_id is provided, else use startup general skills
     if job_id:
-        job_result = await db.execute(
-            select(JobPosting).where(JobPosting.id == job_id)
-        )
-        job = job_result.scalars().first()
+        if job is None:
+            job_result = await db.execute(
+                select(JobPosting).where(JobPosting.id == job_id)
+            )
+            job = job_result.scalars().first()
         if job:
-            startup_keywords = [s.lower() for s in (job.required_skills or [])]
+            startup_bits = encode_skills(job.required_skills)
 
-    keyword_score = calculate_jaccard_similarity(talent_skills, startup_keywords)
-    print(f"DEBUG: Matching {talent.name} to {startup.name}")
-    print(f"DEBUG: Talent Skills: {talent_skills}")
-    print(f"DEBUG: Startup Keywords: {startup_keywords}")
-    print(f"DEBUG: Keyword Score: {keyword_score}")
-    
-    # Score B: Semantic Match (40%)
-    # Get embeddings
-    talent_embedding_result = await db.execute(
-        select(Embedding).where(
-            Embedding.user_id == talent_id,
-            Embedding.text_source == "profile"
+    keyword_score = jaccard_bits(talent_bits, startup_bits)
+    # Runs for every scored pair: build the record only when debug output is on (LOG_LEVELS)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Keyword match",
+            extra={
+                "talent": talent.name,
+                "startup": startup.name,
+                "talent_skills": vocabulary.decode(talent_bits),
+                "startup_keywords": vocabulary.decode(startup_bits),
+                "keyword_score": keyword_score,
+            },
         )
-    )
-    talent_embedding = talent_embedding_result.scalars().first()
     
-    startup_embedding_result = await db.execute(
-        select(Embedding).where(
-            Embedding.user_id == startup_id,
-            Embedding.text_source == "profile"
-        )
-    )
-    startup_embedding = startup_embedding_result.scalars().first()
+    # Score B: Semantic Match (40%)
+    # Compare against the job's own vector when one exists, else the startup profile
+    await match_index.ensure_loaded(db)
+    talent_vector = blended_talent_vector(talent_id)
+    startup_vector = match_index.get(startup_id, "profile")
+    if job_id and match_index.get_job(job_id) is not None:
+        startup_vector = match_index.get_job(job_id)
     
     final_score = 0.0
     semantic_score = 0.0
     # Final Score calculation
     # If we have both embeddings, use hybrid scoring
-    if talent_embedding and startup_embedding:
-        v1 = talent_embedding.embedding
-        v2 = startup_embedding.embedding
-        if isinstance(v1, list) and isinstance(v2, list):
-            semantic_score = cosine_similarity(v1, v2)
+    if talent_vector is not None and startup_vector is not None:
+        semantic_score = similarity(talent_vector, startup_vector)
         final_score = (keyword_score * 0.6) + (semantic_score * 0.4)
     else:
         final_score = keyword_score
     
     # Determine matched and missing skills
-    talent_skill_set = set(talent_skills)
-    required_skill_set = set(required_skills)
-    matched_skills = list(talent_skill_set & required_skill_set)
-    missing_skills = list(required_skill_set - talent_skill_set)
+    matched_skills = vocabulary.decode(talent_bits & required_bits)
+    missing_skills = vocabulary.decode(required_bits & ~talent_bits)
     
     return {
         "user_id": str(startup.user_id),
@@ -203,24 +244,165 @@ async def match_talent_to_startup(
     }
 
 
+async def match_talent_to_jobs(
+    db: AsyncSession,
+    talent: TalentProfile,
+    startup: StartupProfile,
+    jobs: List
+) -> List[Dict]:
+    """Score one talent against many job postings of a startup at once.
+
+    Equivalent to calling match_talent_to_startup(job_id=...) for every job,
+    but keyword scores come from one pass of bitset popcounts and semantic
+    scores from a single matrix product over the indexed job vectors.
+    """
+    if not jobs:
+        return []
+    talent_bits = encode_skills(talent.skills)
+    required_bits = encode_skills(startup.required_skills)
+    keyword_scores = jaccard_many(talent_bits, [encode_skills(job.required_skills) for job in jobs])
+    
+    await match_index.ensure_loaded(db)
+    talent_vector = blended_talent_vector(talent.user_id)
+    startup_vector = match_index.get(str(startup.user_id), "profile")
+    job_scores = (
+        match_index.job_similarities(talent_vector, [str(job.id) for job in jobs])
+        if talent_vector is not None else [None] * len(jobs)
+    )
+    startup_score = similarity(talent_vector, startup_vector)
+    
+    matched_skills = vocabulary.decode(talent_bits & required_bits)
+    missing_skills = vocabulary.decode(required_bits & ~talent_bits)
+    
+    results = []
+    for job, keyword_score, job_score in zip(jobs, keyword_scores, job_scores):
+        semantic_score = 0.0
+        if talent_vector is not None and (job_score is not None or startup_vector is not None):
+            semantic_score = job_score if job_score is not None else startup_score
+            final_score = (keyword_score * 0.6) + (semantic_score * 0.4)
+        else:
+            final_score = keyword_score
+        results.append({
+            "user_id": str(startup.user_id),
+            "job_id": str(job.id),
+            "match_percentage": round(final_score * 100, 2),
+            "score_breakdown": {
+                "skills": round(keyword_score, 2),
+                "semantic": round(semantic_score, 2)
+            },
+            "matched_skills": matched_skills,
+            "missing_skills": missing_skills
+        })
+    return results
+
+
+GLOBAL_GEOGRAPHIES = {"", "global", "any", "worldwide"}
+_REGION_SEPARATOR = re.compile(r"[,;/|]|\band\b")
+_PLACE_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_stage(stage: str) -> str:
+    """Normalize free-text stages ("Series A", "Pre Seed") to FundingStage values."""
+    return "-".join((stage or "").strip().lower().replace("_", " ").split())
+
+
+def investor_stages(investor: InvestorProfile) -> List[FundingStage]:
+    """FundingStage members listed in an investor's `investment_stage`."""
+    known = {s.value for s in FundingStage}
+    return [FundingStage(v) for v in (normalize_stage(s) for s in (investor.investment_stage or [])) if v in known]
+
+
+def _contains_words(words: tuple, run: tuple) -> bool:
+    return any(words[i:i + len(run)] == run for i in range(len(words) - len(run) + 1))
+
+
+def geography_matches(focus: Optional[str], location: Optional[str]) -> bool:
+    """Whether a startup location falls under an investor's geography focus.
+
+    The focus may list several regions ("Nepal, India"). A region matches when
+    its whole words appear in the location, or the location's in it, so "US"
+    matches "Austin, US" but not "Australia".
+    """
+    focus = (focus or "").strip().lower()
+    place = tuple(_PLACE_TOKEN.findall((location or "").lower()))
+    if focus in GLOBAL_GEOGRAPHIES or not place:
+        return True
+    regions = (tuple(_PLACE_TOKEN.findall(part)) for part in _REGION_SEPARATOR.split(focus))
+    return any(
+        _contains_words(place, region) or _contains_words(region, place)
+        for region in regions if region
+    )
+
+
+def passes_hard_filters(startup: StartupProfile, investor: InvestorProfile) -> bool:
+    """Apply an investor's enabled hard filters. Missing data never excludes a pair."""
+    if investor.filter_stage and startup.stage:
+        # Stages we can't map to FundingStage (e.g. "SaaS") count as missing data
+        stages = investor_stages(investor)
+        if stages and startup.stage not in stages:
+            return False
+    if investor.filter_check_size and startup.funding_goal is not None:
+        if investor.check_size_min is not None and startup.funding_goal < investor.check_size_min:
+            return False
+        if investor.check_size_max is not None and startup.funding_goal > investor.check_size_max:
+            return False
+    if investor.filter_geography and not geography_matches(investor.geography_focus, startup.location):
+        return False
+    return True
+
+
+def feasible_investors_query(startup: StartupProfile):
+    """Select investors whose indexed check-size filter admits the startup."""
+    query = select(InvestorProfile)
+    if startup.funding_goal is not None:
+        goal = startup.funding_goal
+        query = query.where(or_(
+            InvestorProfile.filter_check_size.is_(False),
+            and_(
+                or_(InvestorProfile.check_size_min.is_(None), InvestorProfile.check_size_min <= goal),
+                or_(InvestorProfile.check_size_max.is_(None), InvestorProfile.check_size_max >= goal),
+            ),
+        ))
+    return query
+
+
+def feasible_startups_query(investor: InvestorProfile):
+    """Select startups admitted by an investor's indexed stage and check-size filters."""
+    query = select(StartupProfile)
+    stages = investor_stages(investor)
+    if investor.filter_stage and stages:
+        query = query.where(or_(StartupProfile.stage.is_(None), StartupProfile.stage.in_(stages)))
+    if investor.filter_check_size:
+        if investor.check_size_min is not None:
+            query = query.where(or_(StartupProfile.funding_goal.is_(None), StartupProfile.funding_goal >= investor.check_size_min))
+        if investor.check_size_max is not None:
+            query = query.where(or_(StartupProfile.funding_goal.is_(None), StartupProfile.funding_goal <= investor.check_size_max))
+    return query
+
+
 async def match_startup_to_investor(
     db: AsyncSession,
     startup_id: str,
-    investor_id: str
+    investor_id: str,
+    startup: Optional[StartupProfile] = None,
+    investor: Optional[InvestorProfile] = None
 ) -> Dict:
-    """Match startup to investor using hybrid scoring."""
-    from uuid import UUID
-    
+    """Match startup to investor using hybrid scoring.
+
+    Callers that already loaded the profiles can pass them to skip the lookups.
+    """
     # Get profiles
-    startup_result = await db.execute(
-        select(StartupProfile).where(StartupProfile.user_id == startup_id)
-    )
-    startup = startup_result.scalars().first()
+    if startup is None:
+        startup_result = await db.execute(
+            select(StartupProfile).where(StartupProfile.user_id == startup_id)
+        )
+        startup = startup_result.scalars().first()
     
-    investor_result = await db.execute(
-        select(InvestorProfile).where(InvestorProfile.user_id == investor_id)
-    )
-    investor = investor_result.scalars().first()
+    if investor is None:
+        investor_result = await db.execute(
+            select(InvestorProfile).where(InvestorProfile.user_id == investor_id)
+        )
+        investor = investor_result.scalars().first()
     
     if not startup or not investor:
         return {"error": "Profile not found"}
@@ -233,35 +415,20 @@ async def match_startup_to_investor(
     industry_match = calculate_jaccard_similarity(startup_industry, preferred_sectors)
     
     startup_stage = [startup.stage.value.lower()] if startup.stage else []
-    investor_stages = [s.lower() for s in (investor.investment_stage or [])]
+    stages = [normalize_stage(s) for s in (investor.investment_stage or [])]
     
-    stage_match = calculate_jaccard_similarity(startup_stage, investor_stages)
+    stage_match = calculate_jaccard_similarity(startup_stage, stages)
     
     keyword_score = (industry_match + stage_match) / 2
     
     # Score B: Semantic Match (40%)
-    startup_embedding_result = await db.execute(
-        select(Embedding).where(
-            Embedding.user_id == startup_id,
-            Embedding.text_source == "profile"
-        )
-    )
-    startup_embedding = startup_embedding_result.scalars().first()
-    
-    investor_embedding_result = await db.execute(
-        select(Embedding).where(
-            Embedding.user_id == investor_id,
-            Embedding.text_source == "thesis"
-        )
-    )
-    investor_embedding = investor_embedding_result.scalars().first()
+    await match_index.ensure_loaded(db)
+    startup_vector = match_index.get(startup_id, "profile")
+    investor_vector = match_index.get(investor_id, "thesis")
     
     semantic_score = 0.0
-    if startup_embedding and investor_embedding:
-        v1 = startup_embedding.embedding
-        v2 = investor_embedding.embedding
-        if isinstance(v1, list) and isinstance(v2, list):
-            semantic_score = cosine_similarity(v1, v2)
+    if startup_vector is not None and investor_vector is not None:
+        semantic_score = similarity(startup_vector, investor_vector)
         final_score = (keyword_score * 0.5) + (semantic_score * 0.5)
     else:
         final_score = keyword_score
@@ -0,0 +1,184 @@
+"""Prometheus metrics: HTTP requests, database queries, LLM calls and matching stages."""
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+import tracing
+
+# Finer low end than the default buckets: most queries and stages take well under 5 ms
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to the last byte of the response.",
+    ["method", "route", "status"],
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being served.")
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Duration of single SQL statements.", ["operation"], buckets=FAST_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements issued while serving a request.", ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Total SQL time while serving a request.", ["route"], buckets=FAST_BUCKETS
+)
+
+EMBEDDING_SECONDS = Histogram(
+    "embedding_duration_seconds", "generate_embedding latency, including gateway queueing.", ["outcome"],
+    buckets=LLM_BUCKETS,
+)
+EMBEDDING_ERRORS = Counter("embedding_errors_total", "Embeddings that fell back to a zero vector.", ["error"])
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "Model calls admitted by the LLM gateway.", ["model", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_CALL_ERRORS = Counter("llm_call_errors_total", "Model calls that raised.", ["model", "error"])
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds", "Time calls waited for LLM gateway admission.", ["model"], buckets=FAST_BUCKETS
+)
+
+MATCH_STAGE_SECONDS = Histogram(
+    "match_stage_duration_seconds", "Time per stage of computing a ranking.", ["ranking", "stage"],
+    buckets=FAST_BUCKETS,
+)
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+# [statement count, seconds] for the request being served, set by MetricsMiddleware
+_request_queries: ContextVar[Optional[list]] = ContextVar("request_queries", default=None)
+
+
+def sql_operation(statement: str) -> str:
+    word = statement.lstrip()[:6].upper()
+    return word if word in _SQL_OPERATIONS else "OTHER"
+
+
+def record_query(statement: str, seconds: float):
+    """Called from the engine's after_cursor_execute hook."""
+    DB_QUERY_SECONDS.labels(sql_operation(statement)).observe(seconds)
+    totals = _request_queries.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += seconds
+
+
+def begin_request():
+    """Start counting the request's SQL; returns the reset token and the [count, seconds] totals."""
+    totals = [0, 0.0]
+    return _request_queries.set(totals), totals
+
+
+def reset_request(token):
+    """Stop attributing SQL to the request; call from the task that called begin_request."""
+    _request_queries.reset(token)
+
+
+def end_request(totals: list, method: str, route: str, status: int, seconds: float):
+    HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+    DB_QUERIES_PER_REQUEST.labels(route).observe(totals[0])
+    DB_SECONDS_PER_REQUEST.labels(route).observe(totals[1])
+
+
+class StageTimer:
+    """Splits the time spent computing one ranking into stages (load, score, sort, serialize).
+
+    Call `lap(stage)` at the end of each piece of work; the time since the
+    previous lap is charged to `stage`, so interleaved fetching and scoring
+    inside a streamed loop add up per stage. With tracing on, `observe()` adds
+    one span per stage (laid end to end, since laps interleave).
+    """
+
+    def __init__(self, ranking: str):
+        self.ranking = ranking
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.laps: Dict[str, int] = defaultdict(int)
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.seconds[stage] += now - self._last
+        self.laps[stage] += 1
+        self._last = now
+
+    def observe(self):
+        end = time.time_ns()
+        for stage, seconds in reversed(list(self.seconds.items())):
+            MATCH_STAGE_SECONDS.labels(self.ranking, stage).observe(seconds)
+            tracing.record_span(
+                f"match.{stage}", seconds, {"match.ranking": self.ranking, "match.laps": self.laps[stage]},
+                end_ns=end,
+            )
+            end -= int(seconds * 1e9)
+        self.seconds.clear()
+        self.laps.clear()
+
+
+class _RuntimeCollector:
+    """Gauges read at scrape time: DB pool, LLM gateway lanes, caches and the match index."""
+
+    def describe(self):
+        # Registration would otherwise call collect(), importing the app modules during startup
+        return []
+
+    def collect(self):
+        from database import engine
+        from llm_gateway import llm_gateway
+        from cache import response_cache
+        from pitch_cache import pitch_feedback_store
+        from match_index import match_index
+
+        pool = getattr(engine, "pool", None)
+        if pool is not None and hasattr(pool, "checkedout"):
+            g = GaugeMetricFamily("db_pool_connections", "Database pool connections by state.", labels=["state"])
+            g.add_metric(["checked_out"], pool.checkedout())
+            g.add_metric(["checked_in"], pool.checkedin())
+            g.add_metric(["overflow"], max(pool.overflow(), 0))
+            yield g
+            yield GaugeMetricFamily("db_pool_size", "Configured database pool size.", value=pool.size())
+
+        lanes = llm_gateway.stats()
+        in_flight = GaugeMetricFamily("llm_gateway_in_flight", "Admitted model calls running.", labels=["model"])
+        queued = GaugeMetricFamily("llm_gateway_queued", "Model calls waiting for admission.", labels=["model"])
+        rejected = CounterMetricFamily(
+            "llm_gateway_rejected", "Model calls rejected by the gateway.", labels=["model", "reason"]
+        )
+        for model, lane in lanes.items():
+            in_flight.add_metric([model], lane["in_flight"])
+            queued.add_metric([model], lane["queued"])
+            for key, value in lane.items():
+                if key.startswith("rejected_"):
+                    rejected.add_metric([model, key[len("rejected_"):]], value)
+        yield in_flight
+        yield queued
+        yield rejected
+
+        caches = CounterMetricFamily("cache_lookups", "In-process cache lookups.", labels=["cache", "result"])
+        sizes = GaugeMetricFamily("cache_entries", "In-process cache entries.", labels=["cache"])
+        for name, store in (("response", response_cache.local), ("pitch_feedback", pitch_feedback_store.memory)):
+            stats = store.stats()
+            caches.add_metric([name, "hit"], stats["hits"])
+            caches.add_metric([name, "miss"], stats["misses"])
+            sizes.add_metric([name], stats["entries"])
+        yield caches
+        yield sizes
+
+        index = GaugeMetricFamily("match_index_vectors", "Vectors held by the match index.", labels=["kind"])
+        for kind, count in match_index.stats().items():
+            index.add_metric([kind], count)
+        yield index
+
+
+REGISTRY.register(_RuntimeCollector())
+
+
+def render_metrics():
+    """Body and content type for the /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,450 @@
+"""ASGI middleware."""
+import gzip
+import hmac
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional
+
+import orjson
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+
+import metrics
+import query_profiler
+import tracing
+from logging_config import request_id
+from sampling_profiler import StackSampler, render_collapsed
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def route_template(scope) -> str:
+    """Path template of the route serving `scope` (e.g. "/matches/talent")."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", scope["path"])
+    return "unmatched"
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value (1 when absent, 0 when malformed)."""
+    codings = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header: str, supported) -> Optional[str]:
+    """The acceptable coding with the highest q-value; ties go to the earliest in `supported`.
+
+    `q=0` refuses a coding, and `*` covers codings the header doesn't name.
+    """
+    codings = parse_accept_encoding(header)
+    if "x-gzip" in codings and "gzip" not in codings:
+        codings["gzip"] = codings["x-gzip"]
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = codings.get(coding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionStats:
+    """Per-route compression ratio and CPU time."""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"responses": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+        )
+
+    def record(self, route: str, bytes_in: int, bytes_out: int, seconds: float):
+        stats = self._routes[route]
+        stats["responses"] += 1
+        stats["bytes_in"] += bytes_in
+        stats["bytes_out"] += bytes_out
+        stats["seconds"] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            route: {
+                **stats,
+                "ratio": round(stats["bytes_in"] / stats["bytes_out"], 2) if stats["bytes_out"] else 0.0,
+                "avg_ms": round(stats["seconds"] / stats["responses"] * 1000, 3) if stats["responses"] else 0.0,
+            }
+            for route, stats in self._routes.items()
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """Gzip (or brotli, when installed and accepted) compression of buffered responses.
+
+    Bodies smaller than `minimum_size`, already-encoded responses, excluded
+    media types and streaming responses (more than one body message) are
+    passed through untouched so streams keep their time-to-first-byte.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_media_types=("application/x-ndjson", "text/event-stream"),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    def _choose_encoding(self, scope) -> Optional[str]:
+        supported = ("br", "gzip") if brotli else ("gzip",)
+        return choose_encoding(Headers(scope=scope).get("accept-encoding", ""), supported)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith(self.excluded_media_types)
+                or len(body) < self.minimum_size
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            started = time.perf_counter()
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(body, compresslevel=self.gzip_level)
+            compression_stats.record(route_template(scope), len(body), len(compressed), time.perf_counter() - started)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over a per-path byte limit with 413.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read; chunked bodies are cut off once they pass the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def _reject(self, send, limit: int):
+        body = orjson.dumps({"detail": f"Request body exceeds {limit} bytes"})
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def receive_wrapper():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if too_large:
+                # The app may have turned the aborted read into its own error response; replace it
+                if (
+                    not response_started
+                    and message["type"] == "http.response.body"
+                    and not message.get("more_body", False)
+                ):
+                    response_started = True
+                    await self._reject(send, limit)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except _BodyTooLarge:
+            if not response_started:
+                await self._reject(send, limit)
+
+
+class MetricsMiddleware:
+    """Record request latency by route and status, plus the SQL issued per request.
+
+    Latency runs to the last body chunk, so it covers streamed responses but
+    not background tasks that run after the response was sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token, totals = metrics.begin_request()
+        metrics.HTTP_IN_PROGRESS.inc()
+        status = 500
+        finished = False
+
+        # May run in the task that sends a streamed body, so it must not touch the contextvar
+        def finish():
+            nonlocal finished
+            finished = True
+            metrics.HTTP_IN_PROGRESS.dec()
+            metrics.end_request(
+                totals, scope["method"], route_template(scope), status, time.perf_counter() - started
+            )
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                finish()
+            metrics.reset_request(token)
+
+
+class QueryProfilerMiddleware:
+    """Profile the SQL each request issues and warn about repeated statement shapes (N+1).
+
+    With `headers` the statement count and total SQL time are added to the
+    response as X-DB-Query-Count and X-DB-Time (milliseconds).
+    """
+
+    def __init__(self, app, repeat_threshold: int, headers: bool = False):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_profiler.profile_queries() as profile:
+            async def send_wrapper(message):
+                if self.headers and message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(profile.count)
+                    headers["X-DB-Time"] = f"{profile.seconds * 1000:.1f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                query_profiler.warn_repeated(
+                    profile, self.repeat_threshold, f"{scope['method']} {route_template(scope)}"
+                )
+
+
+class RequestIdMiddleware:
+    """Tag each request with an id (the client's X-Request-ID if sane) for log correlation."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get("x-request-id", "")
+        rid = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = request_id.set(rid)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = rid
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
+
+
+class SamplingProfilerMiddleware:
+    """Return a request's sampled stacks instead of its response, for admins who ask.
+
+    Triggered by `?profile=1` or an `X-Profile: 1` header together with a valid
+    X-Admin-Token; other requests pass straight through. The response is
+    replaced by collapsed stacks (text/plain) ready for flamegraph.pl or
+    speedscope. Sampling is wall-clock over all threads, so on a busy worker
+    the profile also contains other requests' work on the event loop.
+    """
+
+    def __init__(self, app, admin_token: str, interval: float):
+        self.app = app
+        self.admin_token = admin_token
+        self.interval = interval
+
+    def _wants_profile(self, scope) -> bool:
+        headers = Headers(scope=scope)
+        requested = headers.get("x-profile") == "1" or b"profile=1" in scope.get("query_string", b"").split(b"&")
+        token = headers.get("x-admin-token", "")
+        return requested and bool(token) and hmac.compare_digest(token, self.admin_token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        sampler = StackSampler(self.interval, loop_thread_id=threading.get_ident()).start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+
+        samples = sampler.samples
+        body = render_collapsed(sampler.take()).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-samples", str(samples).encode()),
+                (b"x-profile-duration", f"{elapsed * 1000:.1f}".encode()),
+                (b"x-profile-status", str(status).encode()),
+                (b"cache-control", b"no-store"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class TracingMiddleware:
+    """Open a server span per request (continuing an incoming W3C `traceparent`).
+
+    SQL statements, LLM calls and matching stages issued while serving the
+    request become its child spans.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with tracing.server_span(scope) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                tracing.finish_server_span(span, route_template(scope), status, request_id.get())
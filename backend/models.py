@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, Float, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Integer, Float, Boolean, ForeignKey, JSON, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from database import Base
 import uuid
@@ -84,13 +84,14 @@ class StartupProfile(Base):
     tagline = Column(String(255))
     logo = Column(String(500))  # S3 URL
     industry = Column(String(100))
-    stage = Column(SQLEnum(FundingStage))
+    stage = Column(SQLEnum(FundingStage), index=True)
+    location = Column(String(100))
     website = Column(String(255))
     founding_year = Column(Integer)
     mrr = Column(Float)
     user_count = Column(Integer)
     growth_rate = Column(Float)
-    funding_goal = Column(Float)
+    funding_goal = Column(Float, index=True)
     equity_offered = Column(Float)
     use_of_funds = Column(Text)
     tech_stack = Column(JSON)
@@ -134,10 +135,14 @@ class InvestorProfile(Base):
     investment_stage = Column(JSON)  # [FundingStage]
     thesis_text = Column(Text)
     preferred_sectors = Column(JSON)
-    check_size_min = Column(Float)
-    check_size_max = Column(Float)
-    geography_focus = Column(String(100))
+    check_size_min = Column(Float, index=True)
+    check_size_max = Column(Float, index=True)
+    geography_focus = Column(String(100), index=True)
     key_signals = Column(JSON)
+    # Hard filters applied before scoring startups against this investor
+    filter_stage = Column(Boolean, default=True, nullable=False)
+    filter_check_size = Column(Boolean, default=True, nullable=False)
+    filter_geography = Column(Boolean, default=False, nullable=False)
     completeness_score = Column(Float, default=0.0)
     updated_at = Column(String(50))
     
@@ -149,6 +154,7 @@ class Embedding(Base):
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    job_id = Column(String(36), ForeignKey("job_postings.id"), nullable=True, index=True)  # Set for 'role_posting'
     embedding = Column(JSON)  # Store as JSON list for MySQL
     text_source = Column(String(100))  # 'profile', 'thesis', 'role_posting'
     created_at = Column(String(50))
@@ -171,3 +177,33 @@ class Match(Base):
     requester = relationship("User", foreign_keys=[requester_id], back_populates="sent_connections")
     target = relationship("User", foreign_keys=[target_id], back_populates="received_connections")
     job = relationship("JobPosting")
+
+
+class PitchFeedbackCache(Base):
+    __tablename__ = "pitch_feedback_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # sha256 of model, prompt version and pitch hash
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    pitch_hash = Column(String(64), nullable=False, index=True)
+    feedback = Column(JSON, nullable=False)
+    created_at = Column(String(50))
+
+
+class CVText(Base):
+    __tablename__ = "cv_texts"
+    
+    # Text extracted from an uploaded CV, shared by every upload with the same content
+    sha256 = Column(String(64), primary_key=True)
+    extractor_version = Column(String(20), nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(String(50))
+
+
+class EcosystemStat(Base):
+    __tablename__ = "ecosystem_stats"
+    
+    # Running counts across all profiles, maintained incrementally on writes
+    kind = Column(String(32), primary_key=True)  # 'startup_role', 'job_skill', 'investor_role', 'total', ...
+    key = Column(String(191), primary_key=True)  # Canonical role or skill name
+    occurrences = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,95 @@
+"""Persistent cache of parsed AI pitch feedback with an in-memory LRU in front."""
+import hashlib
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import TTLCache
+from config import settings
+from models import PitchFeedbackCache
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_pitch(pitch_text: str) -> str:
+    """Case- and whitespace-insensitive form of a pitch, so trivial edits still hit."""
+    return _WHITESPACE.sub(" ", (pitch_text or "").strip().lower())
+
+
+def pitch_hash(pitch_text: str) -> str:
+    return hashlib.sha256(normalize_pitch(pitch_text).encode()).hexdigest()
+
+
+def feedback_cache_key(model: str, prompt_version: str, pitch_text: str) -> str:
+    return hashlib.sha256(f"{model}|{prompt_version}|{pitch_hash(pitch_text)}".encode()).hexdigest()
+
+
+class PitchFeedbackStore:
+    """Two-level cache: process-local LRU, then the pitch_feedback_cache table."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, key: str) -> Optional[Dict]:
+        feedback = self.memory.get(key)
+        if feedback is not None:
+            return feedback
+        row = await db.get(PitchFeedbackCache, key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        self.memory.set(key, row.feedback)
+        return row.feedback
+
+    async def put(self, db: AsyncSession, key: str, model: str, prompt_version: str, pitch_text: str, feedback: Dict):
+        self.memory.set(key, feedback)
+        db.add(PitchFeedbackCache(
+            cache_key=key,
+            model=model,
+            prompt_version=prompt_version,
+            pitch_hash=pitch_hash(pitch_text),
+            feedback=feedback,
+            created_at=datetime.utcnow().isoformat()
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent identical submission stored it first
+            await db.rollback()
+
+    async def invalidate(self, db: AsyncSession, key: Optional[str] = None) -> int:
+        """Drop one entry (or all of them); returns the number of stored rows removed."""
+        if key:
+            self.memory.delete(key)
+            result = await db.execute(delete(PitchFeedbackCache).where(PitchFeedbackCache.cache_key == key))
+        else:
+            self.memory.clear()
+            result = await db.execute(delete(PitchFeedbackCache))
+        await db.commit()
+        return result.rowcount
+
+    async def stats(self, db: AsyncSession) -> Dict:
+        stored = await db.scalar(select(func.count()).select_from(PitchFeedbackCache))
+        memory_hits = self.memory.hits
+        total = memory_hits + self.db_hits + self.misses
+        return {
+            "stored_entries": stored,
+            "memory": self.memory.stats(),
+            "memory_hits": memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": round((memory_hits + self.db_hits) / total, 4) if total else 0.0,
+        }
+
+
+pitch_feedback_store = PitchFeedbackStore(
+    maxsize=settings.PITCH_CACHE_MAX_ENTRIES,
+    ttl=settings.PITCH_CACHE_TTL_SECONDS,
+)
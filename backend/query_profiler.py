@@ -0,0 +1,109 @@
+"""Per-request SQL profiling: statement counts, time and repeated statement shapes (N+1 detection)."""
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|:\w+")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals, placeholders and IN lists collapsed, so repeats group together."""
+    shape = _STRING.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    """Statements executed within one request (or one `profile_queries` block)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, List] = {}  # shape -> [count, seconds]
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, float]]:
+        """Shapes that ran more than `threshold` times, most frequent first."""
+        return sorted(
+            ((shape, n, seconds) for shape, (n, seconds) in self.shapes.items() if n > threshold),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def summary(self, limit: int = 10) -> str:
+        top = sorted(self.shapes.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        lines = [f"{self.count} statements in {self.seconds * 1000:.1f} ms"]
+        lines += [f"  {n:4d}x {seconds * 1000:8.1f} ms  {shape[:200]}" for shape, (n, seconds) in top]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+# Profiles that see every statement in the process, whatever task or thread issued it
+_global: List[QueryProfile] = []
+
+
+def record_query(statement: str, seconds: float):
+    """Called from the engine's after_cursor_execute hook; no-op outside a profiled block."""
+    profile = _current.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+    for watcher in _global:
+        watcher.record(statement, seconds)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """Collect the statements issued by the current task (and tasks it starts) within the block."""
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def warn_repeated(profile: QueryProfile, threshold: int, where: str):
+    for shape, n, seconds in profile.repeated(threshold):
+        logger.warning(
+            "Possible N+1 in %s: statement ran %d times (%.1f ms total): %s",
+            where, n, seconds * 1000, shape[:500],
+        )
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryProfile]:
+    """Fail with the statement breakdown if the block issues more than `limit` statements.
+
+    For tests, e.g.:
+
+        with assert_max_queries(3):
+            client.get("/matches/jobs", headers=auth)
+
+    Counts statements from every task and thread (TestClient runs the app in
+    its own thread), so don't run other database work concurrently. Requires
+    the engine's profiling hooks (QUERY_PROFILER_ENABLED or DEBUG).
+    """
+    profile = QueryProfile()
+    _global.append(profile)
+    try:
+        yield profile
+    finally:
+        _global.remove(profile)
+    if profile.count > limit:
+        raise AssertionError(f"Expected at most {limit} SQL statements, got {profile.summary()}")
@@ -0,0 +1,77 @@
+"""Startup phases, their timings, and the readiness state behind /readyz."""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class Readiness:
+    """Runs named startup phases in order and records how long each took.
+
+    The instance is ready once every registered phase has completed. A
+    failing phase is retried after `retry_seconds` (e.g. while the database
+    is still coming up) and later phases wait for it.
+    """
+
+    def __init__(self):
+        self.created = time.monotonic()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.ready_after: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_after is not None
+
+    async def _run_phase(self, name: str, fn: Callable[[], Awaitable[Any]], retry_seconds: float):
+        phase = self.phases[name]
+        while True:
+            phase["status"] = RUNNING
+            phase["attempts"] += 1
+            started = time.monotonic()
+            try:
+                detail = await fn()
+            except Exception as e:
+                phase.update(status=FAILED, error=f"{type(e).__name__}: {e}",
+                             seconds=round(time.monotonic() - started, 3))
+                logger.warning("Startup phase %s failed (attempt %d), retrying in %ss: %s",
+                               name, phase["attempts"], retry_seconds, phase["error"])
+                await asyncio.sleep(retry_seconds)
+                continue
+            phase.update(status=DONE, error=None, seconds=round(time.monotonic() - started, 3))
+            logger.info("Startup phase %s done in %.3fs", name, phase["seconds"])
+            if detail is not None:
+                phase["detail"] = detail
+            return
+
+    async def _run(self, stages: List[List[Tuple[str, Callable]]], retry_seconds: float):
+        # Phases within a stage run concurrently; stages run in order
+        for stage in stages:
+            await asyncio.gather(*(self._run_phase(name, fn, retry_seconds) for name, fn in stage))
+        self.ready_after = round(time.monotonic() - self.created, 3)
+
+    def start(self, stages: List[List[Tuple[str, Callable[[], Awaitable[Any]]]]], retry_seconds: float = 5.0):
+        """Run the startup phases in the background."""
+        for stage in stages:
+            for name, _ in stage:
+                self.phases[name] = {"status": PENDING, "seconds": None, "attempts": 0, "error": None}
+        self._task = asyncio.create_task(self._run(stages, retry_seconds))
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "ready_after_seconds": self.ready_after,
+            "uptime_seconds": round(time.monotonic() - self.created, 3),
+            "phases": self.phases,
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,59 @@
+"""Admin routes (require the X-Admin-Token header)."""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import get_db
+from dependencies import require_admin
+from pitch_cache import pitch_feedback_store
+from cache import response_cache
+from singleflight import match_flights
+from middleware import compression_stats
+from llm_gateway import llm_gateway
+from ecosystem import rebuild_ecosystem_stats
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Response cache hit/miss and request coalescing statistics."""
+    return {**response_cache.stats(), "singleflight": match_flights.stats()}
+
+
+@router.delete("/cache")
+async def clear_cache():
+    """Drop every locally cached response."""
+    response_cache.clear()
+    return {"message": "Cache cleared"}
+
+
+@router.get("/compression")
+async def get_compression_stats():
+    """Per-route compression ratio and time spent compressing."""
+    return compression_stats.snapshot()
+
+
+@router.get("/llm")
+async def get_llm_gateway_stats():
+    """Per-model LLM gateway queue depth, admissions, rejections and wait times."""
+    return llm_gateway.stats()
+
+
+@router.get("/pitch-cache")
+async def get_pitch_cache_stats(db: AsyncSession = Depends(get_db)):
+    """AI pitch feedback cache hit rates and size."""
+    return await pitch_feedback_store.stats(db)
+
+
+@router.delete("/pitch-cache")
+async def invalidate_pitch_cache(key: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """Invalidate one cached pitch feedback entry by key, or all of them."""
+    removed = await pitch_feedback_store.invalidate(db, key)
+    return {"message": "Pitch feedback cache invalidated", "removed": removed}
+
+
+@router.post("/ecosystem-stats/rebuild")
+async def rebuild_stats(db: AsyncSession = Depends(get_db)):
+    """Recompute the team gap analysis statistics from all profiles."""
+    rows = await rebuild_ecosystem_stats(db)
+    return {"message": "Ecosystem stats rebuilt", "rows": rows}
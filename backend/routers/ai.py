@@ -3,23 +3,69 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from database import get_db
-from models import User, UserRole
+from sqlalchemy import select
+from models import User, UserRole, StartupProfile
 from dependencies import get_current_user
 from config import settings
 from mock_data import MOCK_PITCH_FEEDBACK, MOCK_TEAM_GAP_ANALYSIS
-from langchain_google_genai import ChatGoogleGenerativeAI
+from pitch_cache import pitch_feedback_store, feedback_cache_key
+from ecosystem import analyze_team_gaps
+from database import run_with_session
+from streaming import JSONSectionParser, sse_event, sse_response
+from fake_llm import FakeChatModel
+from llm_gateway import llm_gateway, GatewayRejected, INTERACTIVE
+from llm_clients import PITCH_MODEL, aget_chat_model
 import json
 
-chat_model = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=settings.GOOGLE_API_KEY
-) if settings.GOOGLE_API_KEY else None
-
 router = APIRouter()
 
+# Bump PITCH_PROMPT_VERSION whenever the template changes so cached feedback is not reused
+PITCH_PROMPT_VERSION = "1"
+PITCH_PROMPT_TEMPLATE = """Act as a Kathmandu-based Angel Investor. Critique this pitch based on Market Size in Nepal and Team-Market fit.
+
+Pitch:
+{pitch_text}
+
+Provide structured feedback in JSON format with the following sections:
+1. market_size_score (1-10)
+2. market_size_feedback (text)
+3. team_market_fit_score (1-10)
+4. team_market_fit_feedback (text)
+5. traction_narrative_score (1-10)
+6. traction_narrative_feedback (text)
+7. defensibility_score (1-10)
+8. defensibility_feedback (text)
+9. overall_assessment (text)
+10. suggestions (array of strings)
+"""
+
+PITCH_SYSTEM_PROMPT = "You are a Kathmandu-based Angel Investor providing structured pitch feedback."
+
+
 class PitchFeedbackRequest(BaseModel):
     pitch_text: str
 
+
+def pitch_messages(pitch_text: str):
+    return [
+        ("system", PITCH_SYSTEM_PROMPT),
+        ("user", PITCH_PROMPT_TEMPLATE.format(pitch_text=pitch_text)),
+    ]
+
+
+def parse_feedback(feedback_text: str):
+    """Parse model output into feedback; returns (feedback, is_structured)."""
+    try:
+        # Clean up potential markdown formatting in response
+        if "```json" in feedback_text:
+            feedback_text = feedback_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in feedback_text:
+            feedback_text = feedback_text.split("```")[1].split("```")[0].strip()
+        
+        return json.loads(feedback_text), True
+    except Exception:
+        return {"raw_feedback": feedback_text}, False
+
 @router.post("/pitch-feedback")
 async def get_pitch_feedback(
     request: PitchFeedbackRequest,
@@ -36,59 +82,118 @@ async def get_pitch_feedback(
         await asyncio.sleep(1)  # Simulate API delay
         return MOCK_PITCH_FEEDBACK
     
+    chat_model = await aget_chat_model()
     if not chat_model:
         raise HTTPException(status_code=500, detail="Gemini API key not configured")
 
-    prompt = f"""Act as a Kathmandu-based Angel Investor. Critique this pitch based on Market Size in Nepal and Team-Market fit.
-
-Pitch:
-{request.pitch_text}
-
-Provide structured feedback in JSON format with the following sections:
-1. market_size_score (1-10)
-2. market_size_feedback (text)
-3. team_market_fit_score (1-10)
-4. team_market_fit_feedback (text)
-5. traction_narrative_score (1-10)
-6. traction_narrative_feedback (text)
-7. defensibility_score (1-10)
-8. defensibility_feedback (text)
-9. overall_assessment (text)
-10. suggestions (array of strings)
-"""
+    # Identical (or trivially re-formatted) pitches reuse the stored feedback
+    cache_key = feedback_cache_key(PITCH_MODEL, PITCH_PROMPT_VERSION, request.pitch_text)
+    cached = await pitch_feedback_store.get(db, cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        # Use LangChain's invoke for Gemini
-        response = await chat_model.ainvoke([
-            ("system", "You are a Kathmandu-based Angel Investor providing structured pitch feedback."),
-            ("user", prompt)
-        ])
-        
-        feedback_text = response.content
+        # Use LangChain's invoke for Gemini, admitted through the shared rate limits
+        response = await llm_gateway.call(
+            PITCH_MODEL,
+            lambda: chat_model.ainvoke(pitch_messages(request.pitch_text)),
+            priority=INTERACTIVE,
+            timeout=settings.LLM_INTERACTIVE_TIMEOUT_SECONDS,
+        )
         
         # Try to parse as JSON, fallback to text
-        try:
-            # Clean up potential markdown formatting in response
-            if "```json" in feedback_text:
-                feedback_text = feedback_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in feedback_text:
-                feedback_text = feedback_text.split("```")[1].split("```")[0].strip()
-            
-            feedback = json.loads(feedback_text)
-        except:
-            feedback = {"raw_feedback": feedback_text}
+        feedback, structured = parse_feedback(response.content)
+        if structured:
+            # Only well-formed structured feedback is worth caching
+            await pitch_feedback_store.put(
+                db, cache_key, PITCH_MODEL, PITCH_PROMPT_VERSION, request.pitch_text, feedback
+            )
         
         return feedback
+    except GatewayRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail="AI service is busy, please retry shortly",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
 
+@router.post("/pitch-feedback/stream")
+async def stream_pitch_feedback(
+    request: PitchFeedbackRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream AI feedback on a pitch as server-sent events.
+
+    Events: `token` (raw model text as it arrives), `section` (one top-level
+    feedback field as soon as it is complete), then `result` with the full
+    feedback, or `error`.
+    """
+    if current_user.role != UserRole.FOUNDER:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    if settings.USE_MOCK_DATA:
+        model = FakeChatModel(MOCK_PITCH_FEEDBACK)
+        cached = None
+    else:
+        model = await aget_chat_model()
+        if not model:
+            raise HTTPException(status_code=500, detail="Gemini API key not configured")
+        cache_key = feedback_cache_key(PITCH_MODEL, PITCH_PROMPT_VERSION, request.pitch_text)
+        cached = await pitch_feedback_store.get(db, cache_key)
+    
+    async def events():
+        if cached is not None:
+            # Rows written by older versions may not be objects; replay those as the result only
+            if isinstance(cached, dict):
+                for key, value in cached.items():
+                    yield sse_event("section", {"key": key, "value": value})
+            yield sse_event("result", cached)
+            return
+        
+        parser = JSONSectionParser()
+        chunks = []
+        try:
+            # The gateway slot is held for the whole stream
+            async with llm_gateway.slot(
+                PITCH_MODEL, priority=INTERACTIVE, timeout=settings.LLM_INTERACTIVE_TIMEOUT_SECONDS
+            ):
+                async for chunk in model.astream(pitch_messages(request.pitch_text)):
+                    text = chunk.content
+                    if not text:
+                        continue
+                    chunks.append(text)
+                    yield sse_event("token", {"text": text})
+                    for key, value in parser.feed(text):
+                        yield sse_event("section", {"key": key, "value": value})
+        except GatewayRejected as e:
+            yield sse_event("error", {"detail": "AI service is busy, please retry shortly", "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": f"AI service error: {str(e)}"})
+            return
+        
+        feedback, structured = parse_feedback("".join(chunks))
+        # The request's session is closed once streaming starts, so store with a fresh one
+        if structured and not settings.USE_MOCK_DATA:
+            await run_with_session(
+                pitch_feedback_store.put, cache_key, PITCH_MODEL, PITCH_PROMPT_VERSION,
+                request.pitch_text, feedback
+            )
+        yield sse_event("result", feedback)
+    
+    return sse_response(events())
+
+
 @router.get("/team-gap-analysis")
 async def get_team_gap_analysis(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get AI analysis of team gaps."""
+    """Analyze team gaps against ecosystem-wide role and skill demand."""
     if current_user.role != UserRole.FOUNDER:
         raise HTTPException(status_code=403, detail="Access denied")
     
@@ -97,26 +202,12 @@ async def get_team_gap_analysis(
         await asyncio.sleep(0.5)  # Simulate API delay
         return MOCK_TEAM_GAP_ANALYSIS
     
-    # This would analyze the startup profile and identify missing critical roles
-    # For now, return a structured response
-    return {
-        "gaps": [
-            {
-                "role": "CFO/Finance Lead",
-                "impact": "High",
-                "reason": "Investors require financial planning and reporting",
-                "recommended_action": "Post a role for Finance Lead"
-            },
-            {
-                "role": "Technical Lead",
-                "impact": "Critical",
-                "reason": "Startup requires strong technical foundation",
-                "recommended_action": "Post a role for Senior Developer"
-            }
-        ],
-        "investor_readiness_score": 65,
-        "recommendations": [
-            "Add a CFO to improve investor confidence",
-            "Strengthen technical team to demonstrate product capability"
-        ]
-    }
+    result = await db.execute(
+        select(StartupProfile).where(StartupProfile.user_id == current_user.id)
+    )
+    profile = result.scalar_one_or_none()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Startup profile not found")
+    
+    # Reads the precomputed ecosystem_stats rows, not every profile
+    return await analyze_team_gaps(db, profile)
@@ -4,13 +4,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from database import get_db
 from models import User, UserRole
-from auth import get_password_hash, verify_password, create_access_token, get_user_by_email
+from auth import get_password_hash_async, verify_password_async, create_access_token, get_user_by_email
 from datetime import datetime, timedelta
 from config import settings
 from mock_data import MOCK_USERS
+from cache import data_versions
+from ecosystem import apply_stat_deltas, startup_contribution, investor_contribution
 
 router = APIRouter()
 
+# Data domain that gains a profile when a user of each role registers
+ROLE_DATA_DOMAINS = {
+    UserRole.TALENT: "talent",
+    UserRole.FOUNDER: "startups",
+    UserRole.INVESTOR: "investors",
+}
+
 
 class UserRegister(BaseModel):
     email: EmailStr
@@ -56,7 +65,7 @@ async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     # Create user
     new_user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         role=user_data.role,
         profile_data={},
         created_at=datetime.utcnow().isoformat()
@@ -82,6 +91,7 @@ async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
             updated_at=datetime.utcnow().isoformat()
         )
         db.add(new_profile)
+        await apply_stat_deltas(db, startup_contribution(None), startup_contribution(new_profile))
     elif user_data.role == UserRole.INVESTOR:
         new_profile = InvestorProfile(
             user_id=new_user.id,
@@ -89,8 +99,10 @@ async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
             updated_at=datetime.utcnow().isoformat()
         )
         db.add(new_profile)
+        await apply_stat_deltas(db, investor_contribution(None), investor_contribution(new_profile))
     
     await db.commit()
+    await data_versions.bump(ROLE_DATA_DOMAINS[user_data.role])
     
     # Create token
     access_token = create_access_token(data={"sub": str(new_user.id), "role": user_data.role.value})
@@ -132,12 +144,20 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     
     user = await get_user_by_email(db, credentials.email)
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password_async(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    # Transparently upgrade hashes made with outdated parameters
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    
     # Create token
     access_token = create_access_token(data={"sub": str(user.id), "role": user.role.value})
     
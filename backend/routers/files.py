@@ -0,0 +1,57 @@
+"""Signed file routes backing presigned URLs of the local storage backend."""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+from storage import get_storage, LocalStorage, StorageError
+from uploads import save_stream, UploadTooLarge, UploadRejected
+from config import settings
+import os
+
+router = APIRouter()
+
+
+def _local_storage() -> LocalStorage:
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    return storage
+
+
+@router.get("/{key:path}")
+async def download_file(key: str, request: Request):
+    """Serve a stored file for a valid signed GET URL."""
+    storage = _local_storage()
+    if not storage.verify("GET", key, dict(request.query_params)):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    try:
+        path = storage.path(key)
+    except StorageError:
+        raise HTTPException(status_code=400, detail="Invalid key")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, filename=os.path.basename(key))
+
+
+@router.put("/{key:path}")
+async def upload_file(key: str, request: Request):
+    """Accept the body of a signed PUT URL; size and sha256 must match what was signed."""
+    storage = _local_storage()
+    params = dict(request.query_params)
+    if not storage.verify("PUT", key, params):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    
+    size = int(params["size"])
+    content_length = request.headers.get("content-length")
+    if content_length is not None and int(content_length) != size:
+        raise HTTPException(status_code=400, detail="Content-Length does not match the signed size")
+    
+    try:
+        stored = await save_stream(
+            request.stream(), key, size, settings.UPLOAD_STAGING_DIR, expected_sha256=params["sha256"]
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Body exceeds the signed size")
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StorageError:
+        raise HTTPException(status_code=400, detail="Invalid key")
+    return {"key": stored.key, "size": stored.size}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from pydantic import BaseModel
@@ -6,7 +6,10 @@ from typing import Optional, List, Dict
 from database import get_db
 from models import User, StartupProfile, UserRole, JobPosting
 from dependencies import get_current_user
-from matching import generate_embedding, store_embedding
+from http_cache import make_etag, etag_matches, not_modified, set_etag
+from matching import generate_embedding, store_embedding, delete_job_embedding, job_embedding_text
+from cache import data_versions
+from ecosystem import apply_stat_deltas, startup_contribution, job_contribution
 from datetime import datetime
 from uuid import UUID
 from config import settings
@@ -20,6 +23,7 @@ class StartupProfileUpdate(BaseModel):
     tagline: Optional[str] = None
     industry: Optional[str] = None
     stage: Optional[str] = None
+    location: Optional[str] = None
     website: Optional[str] = None
     founding_year: Optional[int] = None
     mrr: Optional[float] = None
@@ -56,6 +60,8 @@ class JobPostingUpdate(BaseModel):
 
 @router.get("/profile")
 async def get_startup_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -74,6 +80,12 @@ async def get_startup_profile(
     if not profile:
         return {"message": "Profile not created yet"}
     
+    # Revalidation: the profile only changes when updated_at does
+    etag = make_etag(str(profile.id), profile.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     return {
         "id": str(profile.id),
         "user_id": str(profile.user_id),
@@ -81,6 +93,7 @@ async def get_startup_profile(
         "tagline": profile.tagline,
         "industry": profile.industry,
         "stage": profile.stage.value if profile.stage else None,
+        "location": profile.location,
         "website": profile.website,
         "founding_year": profile.founding_year,
         "mrr": profile.mrr,
@@ -112,6 +125,7 @@ async def update_startup_profile(
         select(StartupProfile).where(StartupProfile.user_id == current_user.id)
     )
     profile = result.scalar_one_or_none()
+    stats_before = startup_contribution(profile)
     
     if not profile:
         profile = StartupProfile(user_id=current_user.id)
@@ -130,6 +144,7 @@ async def update_startup_profile(
     filled = sum(1 for field in fields if getattr(profile, field))
     profile.completeness_score = (filled / len(fields)) * 100
     
+    await apply_stat_deltas(db, stats_before, startup_contribution(profile))
     await db.commit()
     await db.refresh(profile)
     
@@ -137,6 +152,7 @@ async def update_startup_profile(
     profile_text = f"{profile.name or ''} {profile.tagline or ''} {profile.problem_statement or ''} {' '.join(profile.tech_stack or [])}"
     embedding = await generate_embedding(profile_text)
     await store_embedding(db, str(current_user.id), embedding, "profile")
+    await data_versions.bump("startups")
     
     return {"message": "Profile updated", "completeness_score": profile.completeness_score}
 
@@ -171,8 +187,15 @@ async def create_job(
         updated_at=datetime.utcnow().isoformat()
     )
     db.add(job)
+    await apply_stat_deltas(db, job_contribution(None), job_contribution(job))
     await db.commit()
     await db.refresh(job)
+    
+    # Generate and store job embedding for job-specific semantic matching
+    embedding = await generate_embedding(job_embedding_text(job))
+    await store_embedding(db, str(current_user.id), embedding, "role_posting", job_id=str(job.id))
+    await data_versions.bump("jobs")
+    
     return {
         "id": str(job.id),
         "startup_id": str(job.startup_id),
@@ -248,13 +271,21 @@ async def update_job(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found or unauthorized")
     
+    stats_before = job_contribution(job)
     update_data = job_data.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(job, key, value)
     job.updated_at = datetime.utcnow().isoformat()
     
+    await apply_stat_deltas(db, stats_before, job_contribution(job))
     await db.commit()
     await db.refresh(job)
+    
+    # Re-embed the posting
+    embedding = await generate_embedding(job_embedding_text(job))
+    await store_embedding(db, str(current_user.id), embedding, "role_posting", job_id=str(job.id))
+    await data_versions.bump("jobs")
+    
     return {
         "id": str(job.id),
         "startup_id": str(job.startup_id),
@@ -293,6 +324,9 @@ async def delete_job(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found or unauthorized")
     
+    await delete_job_embedding(db, str(job.id))
+    await apply_stat_deltas(db, job_contribution(job), job_contribution(None))
     await db.delete(job)
     await db.commit()
+    await data_versions.bump("jobs")
     return {"message": "Job deleted"}
@@ -1,13 +1,17 @@
 """Investor routes."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 from typing import Optional, List
-from database import get_db
+from database import get_db, AsyncSessionLocal, stream_scalars
 from models import User, InvestorProfile, UserRole
 from dependencies import get_current_user
+from http_cache import make_etag, etag_matches, not_modified, set_etag
 from matching import generate_embedding, store_embedding
+from cache import data_versions
+from ecosystem import apply_stat_deltas, investor_contribution
+from streaming import ndjson_response
 from datetime import datetime
 from config import settings
 from mock_data import MOCK_INVESTOR_PROFILE
@@ -26,10 +30,27 @@ class InvestorThesisUpdate(BaseModel):
     check_size_max: Optional[float] = None
     geography_focus: Optional[str] = None
     key_signals: Optional[List[str]] = None
+    filter_stage: Optional[bool] = None
+    filter_check_size: Optional[bool] = None
+    filter_geography: Optional[bool] = None
+
+
+class InvestorSummary(BaseModel):
+    id: str
+    user_id: str
+    name: Optional[str] = None
+    fund: Optional[str] = None
+    type: Optional[str] = None
+    investment_stage: Optional[List[str]] = None
+    preferred_sectors: Optional[List[str]] = None
+    geography_focus: Optional[str] = None
+    completeness_score: Optional[float] = None
 
 
 @router.get("/thesis")
 async def get_investor_thesis(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -62,6 +83,12 @@ async def get_investor_thesis(
     if not profile:
         return {"message": "Profile not created yet"}
     
+    # Revalidation: the profile only changes when updated_at does
+    etag = make_etag(str(profile.id), profile.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     return {
         "id": str(profile.id),
         "user_id": str(profile.user_id),
@@ -75,6 +102,9 @@ async def get_investor_thesis(
         "check_size_max": profile.check_size_max,
         "geography_focus": profile.geography_focus,
         "key_signals": profile.key_signals,
+        "filter_stage": profile.filter_stage,
+        "filter_check_size": profile.filter_check_size,
+        "filter_geography": profile.filter_geography,
         "completeness_score": profile.completeness_score
     }
 
@@ -93,6 +123,7 @@ async def update_investor_thesis(
         select(InvestorProfile).where(InvestorProfile.user_id == current_user.id)
     )
     profile = result.scalar_one_or_none()
+    stats_before = investor_contribution(profile)
     
     if not profile:
         profile = InvestorProfile(user_id=current_user.id)
@@ -100,6 +131,10 @@ async def update_investor_thesis(
     
     # Update fields
     update_data = thesis_data.dict(exclude_unset=True)
+    # The filter switches are NOT NULL; an explicit null leaves them unchanged
+    for key in ("filter_stage", "filter_check_size", "filter_geography"):
+        if update_data.get(key, False) is None:
+            del update_data[key]
     for key, value in update_data.items():
         setattr(profile, key, value)
     
@@ -111,6 +146,7 @@ async def update_investor_thesis(
     filled = sum(1 for field in fields if getattr(profile, field))
     profile.completeness_score = (filled / len(fields)) * 100
     
+    await apply_stat_deltas(db, stats_before, investor_contribution(profile))
     await db.commit()
     await db.refresh(profile)
     
@@ -118,14 +154,16 @@ async def update_investor_thesis(
     thesis_text = f"{profile.thesis_text or ''} {' '.join(profile.preferred_sectors or [])} {' '.join(profile.key_signals or [])}"
     embedding = await generate_embedding(thesis_text)
     await store_embedding(db, str(current_user.id), embedding, "thesis")
+    await data_versions.bump("investors")
     
     return {"message": "Thesis updated", "completeness_score": profile.completeness_score}
-@router.get("/all")
+@router.get("/all", response_model=List[InvestorSummary])
 async def get_all_investors(
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all investor profiles for the network view."""
+    """Get all investor profiles for the network view (`?format=ndjson` streams them)."""
     if current_user.role != UserRole.INVESTOR:
         raise HTTPException(status_code=403, detail="Access denied")
     
@@ -133,22 +171,33 @@ async def get_all_investors(
         # Return a list containing the mock investor
         return [MOCK_INVESTOR_PROFILE]
     
+    if format == "ndjson":
+        # The request session is closed before the body is sent, so the stream owns its own
+        return ndjson_response(_stream_investor_summaries())
+    
     result = await db.execute(
         select(InvestorProfile)
     )
     profiles = result.scalars().all()
     
-    return [
-        {
-            "id": str(p.id),
-            "user_id": str(p.user_id),
-            "name": p.name,
-            "fund": p.fund,
-            "type": p.type,
-            "investment_stage": p.investment_stage,
-            "preferred_sectors": p.preferred_sectors,
-            "geography_focus": p.geography_focus,
-            "completeness_score": p.completeness_score
-        }
-        for p in profiles
-    ]
+    return [_investor_summary(p) for p in profiles]
+
+
+def _investor_summary(p: InvestorProfile) -> dict:
+    return {
+        "id": str(p.id),
+        "user_id": str(p.user_id),
+        "name": p.name,
+        "fund": p.fund,
+        "type": p.type,
+        "investment_stage": p.investment_stage,
+        "preferred_sectors": p.preferred_sectors,
+        "geography_focus": p.geography_focus,
+        "completeness_score": p.completeness_score
+    }
+
+
+async def _stream_investor_summaries():
+    async with AsyncSessionLocal() as session:
+        async for profile in stream_scalars(session, select(InvestorProfile)):
+            yield _investor_summary(profile)
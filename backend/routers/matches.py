@@ -1,14 +1,23 @@
 """Matching routes."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
-from pydantic import BaseModel
-from typing import List, Optional
-from database import get_db
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Dict, Optional, Union
+from database import get_db, run_with_session, stream_scalars
 from models import User, Match, MatchStatus, TalentProfile, StartupProfile, InvestorProfile, UserRole, JobPosting
-from dependencies import get_current_user
-from matching import match_talent_to_startup, match_startup_to_investor
+from dependencies import get_current_user_claims
+from matching import (
+    match_talent_to_startup, match_talent_to_jobs, match_startup_to_investor,
+    feasible_investors_query, feasible_startups_query, passes_hard_filters, blended_talent_vector
+)
+from skills import encode_skills, overlap_many
+from match_index import match_index
+from cache import cached_response, data_versions
+from http_cache import make_etag, etag_matches, etag_headers, not_modified, set_etag
+from streaming import ndjson_response
+from metrics import StageTimer
 from datetime import datetime
 from uuid import UUID
 from config import settings
@@ -16,6 +25,38 @@ from mock_data import MOCK_TALENT_MATCHES, MOCK_INVESTOR_MATCHES, MOCK_STARTUP_M
 
 router = APIRouter()
 
+# mock_data has startup-shaped matches only; /matches/jobs needs JobMatch rows
+MOCK_JOB_MATCHES = [
+    {
+        "job_id": "mock-job-1",
+        "startup_id": "mock-startup-1",
+        "founder_user_id": "mock-founder-1",
+        "title": "Full Stack Engineer",
+        "description": "Build the merchant dashboard and payments API.",
+        "location": "Kathmandu",
+        "job_type": "Full-time",
+        "compensation": "NPR 150,000/month + equity",
+        "required_skills": ["python", "react", "sql"],
+        "startup_name": "PayNepal",
+        "industry": "Fintech",
+        "match_percentage": 82.5,
+    },
+    {
+        "job_id": "mock-job-2",
+        "startup_id": "mock-startup-2",
+        "founder_user_id": "mock-founder-2",
+        "title": "Mobile Developer",
+        "description": "Ship the farmer-facing Android app.",
+        "location": "Remote",
+        "job_type": "Contract",
+        "compensation": "NPR 90,000/month",
+        "required_skills": ["kotlin", "android"],
+        "startup_name": "KrishiLink",
+        "industry": "Agritech",
+        "match_percentage": 61.0,
+    },
+]
+
 
 class ConnectionRequest(BaseModel):
     target_id: str
@@ -23,26 +64,151 @@ class ConnectionRequest(BaseModel):
     job_id: Optional[str] = None
 
 
-@router.get("/talent")
-async def get_talent_matches(
-    job_id: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+class TalentMatch(BaseModel):
+    talent_id: str
+    user_id: str
+    name: Optional[str] = None
+    headline: Optional[str] = None
+    job_id: Optional[str] = None
+    match_percentage: float
+    score_breakdown: Dict[str, float] = {}
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
+
+
+class InvestorMatch(BaseModel):
+    investor_id: str
+    user_id: str
+    name: Optional[str] = None
+    fund: Optional[str] = None
+    type: Optional[str] = None
+    match_percentage: float
+    score_breakdown: Dict[str, float] = {}
+
+
+class StartupMatch(BaseModel):
+    startup_id: str
+    user_id: str
+    name: Optional[str] = None
+    tagline: Optional[str] = None
+    industry: Optional[str] = None
+    match_percentage: float
+    score_breakdown: Dict[str, float] = {}
+    matched_skills: Optional[List[str]] = None
+    missing_skills: Optional[List[str]] = None
+
+
+class JobMatch(BaseModel):
+    job_id: str
+    startup_id: str
+    founder_user_id: str
+    title: str
+    description: Optional[str] = None
+    location: Optional[str] = None
+    job_type: Optional[str] = None
+    compensation: Optional[str] = None
+    required_skills: List[str] = []
+    startup_name: Optional[str] = None
+    industry: Optional[str] = None
+    match_percentage: float
+
+
+class ConnectionRequestResponse(BaseModel):
+    message: str
+    match_id: str
+
+
+class Applicant(BaseModel):
+    match_id: str
+    talent_id: str
+    name: Optional[str] = None
+    headline: Optional[str] = None
+    message: Optional[str] = None
+    status: str
+    created_at: Optional[str] = None
+
+
+class SentConnection(BaseModel):
+    id: str
+    target_id: str
+    job_id: Optional[str] = None
+    status: str
+    message: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class ReceivedConnection(BaseModel):
+    id: str
+    requester_id: str
+    job_id: Optional[str] = None
+    status: str
+    message: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class ConnectionsResponse(BaseModel):
+    sent: List[SentConnection]
+    received: List[ReceivedConnection]
+
+
+# Data domains each ranking depends on; writes to any of them invalidate cached responses
+TALENT_MATCH_DOMAINS = ("talent", "startups", "jobs")
+INVESTOR_MATCH_DOMAINS = ("investors", "startups")
+STARTUP_MATCH_DOMAINS = ("talent", "startups")
+JOB_MATCH_DOMAINS = ("talent", "startups", "jobs")
+
+# `?format=ndjson` streams the ranked rows as newline-delimited JSON
+FORMAT_QUERY = Query(None, pattern="^(json|ndjson)$")
+
+# Ranking response models, for validating and encoding the JSON body in one pass
+TALENT_MATCHES = TypeAdapter(List[TalentMatch])
+INVESTOR_MATCHES = TypeAdapter(Union[List[InvestorMatch], List[StartupMatch]])
+STARTUP_MATCHES = TypeAdapter(List[StartupMatch])
+JOB_MATCHES = TypeAdapter(List[JobMatch])
+
+
+async def serve_ranking(
+    request: Request,
+    response: Response,
+    user_id: str,
+    endpoint: str,
+    params: Dict,
+    domains,
+    compute,
+    format: Optional[str] = None,
+    adapter: Optional[TypeAdapter] = None
 ):
-    """Get matched talent for founder's startup or specific job."""
-    if current_user.role != UserRole.FOUNDER:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    if settings.USE_MOCK_DATA:
-        return MOCK_TALENT_MATCHES
-    
-    # Get all talent profiles
-    talent_result = await db.execute(select(TalentProfile))
-    all_talent = talent_result.scalars().all()
+    """Serve a ranking with ETag revalidation, response caching and optional NDJSON.
+
+    The ETag depends only on the data versions, so a client that is up to date
+    gets its 304 before any query or scoring runs. With `adapter` (the route's
+    response model) the JSON body is validated and encoded here, in one pass,
+    and timed as the ranking's serialize stage.
+    """
+    versions = await data_versions.snapshot(domains)
+    etag = make_etag(user_id, endpoint, params, format, versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
+    matches = await cached_response(user_id, endpoint, params, domains, compute, versions=versions)
+    if format == "ndjson":
+        return ndjson_response(matches, headers=etag_headers(etag))
+    if adapter is not None:
+        timer = StageTimer(endpoint)
+        body = adapter.dump_json(adapter.validate_python(matches))
+        timer.lap("serialize")
+        timer.observe()
+        return Response(body, media_type="application/json", headers=etag_headers(etag))
+    set_etag(response, etag)
+    return matches
+
+
+async def compute_talent_matches(db: AsyncSession, user_id: str, job_id: Optional[str] = None) -> List[Dict]:
+    """Rank all talent for a founder's startup, or for one of its jobs."""
+    timer = StageTimer("matches/talent")
     # Get startup profile
     startup_result = await db.execute(
-        select(StartupProfile).where(StartupProfile.user_id == current_user.id)
+        select(StartupProfile).where(StartupProfile.user_id == user_id)
     )
     startup = startup_result.scalars().first()
     
@@ -52,38 +218,44 @@ async def get_talent_matches(
     # If job_id provided, match specifically for that job
     # Otherwise, we match against startup profile and ALL jobs, taking the max score
     active_jobs = []
+    job = None
     if not job_id:
         jobs_result = await db.execute(select(JobPosting).where(JobPosting.startup_id == startup.id))
         active_jobs = jobs_result.scalars().all()
+    elif job_id != "[object Object]":
+        job_result = await db.execute(select(JobPosting).where(JobPosting.id == job_id))
+        job = job_result.scalars().first()
+    await match_index.ensure_loaded(db)
 
     matches = []
-    for talent in all_talent:
+    # Talent is streamed through a server-side cursor; scoring below issues no queries
+    async for talent in stream_scalars(db, select(TalentProfile)):
+        timer.lap("load")
         # Baseline match against startup profile
         best_match = await match_talent_to_startup(
             db, 
             str(talent.user_id), 
-            str(current_user.id),
-            job_id=None
+            user_id,
+            job_id=None,
+            talent=talent,
+            startup=startup
         )
         
         # If no job_id specified, check if talent matches any specific job better
-        if not job_id:
-            for job in active_jobs:
-                job_match = await match_talent_to_startup(
-                    db,
-                    str(talent.user_id),
-                    str(current_user.id),
-                    job_id=str(job.id)
-                )
-                if "error" not in job_match and job_match["match_percentage"] > best_match["match_percentage"]:
+        if not job_id and "error" not in best_match:
+            for job_match in await match_talent_to_jobs(db, talent, startup, active_jobs):
+                if job_match["match_percentage"] > best_match["match_percentage"]:
                     best_match = job_match
-        elif job_id and job_id != "[object Object]":
+        elif job:
             # If specific job_id was requested, refine the match
             best_match = await match_talent_to_startup(
                 db,
                 str(talent.user_id),
-                str(current_user.id),
-                job_id=job_id
+                user_id,
+                job_id=str(job.id),
+                talent=talent,
+                startup=startup,
+                job=job
             )
 
         if "error" not in best_match:
@@ -93,73 +265,188 @@ async def get_talent_matches(
                 "headline": talent.headline,
                 **best_match
             })
+        timer.lap("score")
+    timer.lap("load")
     
     # Sort by match percentage
     matches.sort(key=lambda x: x["match_percentage"], reverse=True)
+    timer.lap("sort")
+    timer.observe()
+    
+    return matches
+
+
+async def compute_investor_matches_for_founder(db: AsyncSession, user_id: str) -> List[Dict]:
+    """Rank feasible investors for a founder's startup."""
+    timer = StageTimer("matches/investors")
+    startup_result = await db.execute(
+        select(StartupProfile).where(StartupProfile.user_id == user_id)
+    )
+    startup = startup_result.scalars().first()
+    if not startup:
+        return []
+    await match_index.ensure_loaded(db)
+    
+    matches = []
+    # Only score investors that pass their own hard filters
+    async for investor in stream_scalars(db, feasible_investors_query(startup)):
+        timer.lap("load")
+        if not passes_hard_filters(startup, investor):
+            continue
+        match_result = await match_startup_to_investor(
+            db, user_id, str(investor.user_id),
+            startup=startup, investor=investor
+        )
+        if "error" not in match_result:
+            matches.append({
+                "investor_id": str(investor.user_id),
+                "name": investor.name,
+                "fund": investor.fund,
+                "type": investor.type,
+                **match_result
+            })
+        timer.lap("score")
+    timer.lap("load")
     
+    matches.sort(key=lambda x: x["match_percentage"], reverse=True)
+    timer.lap("sort")
+    timer.observe()
     return matches
 
 
-@router.get("/investors")
+async def compute_startup_matches_for_investor(db: AsyncSession, user_id: str) -> List[Dict]:
+    """Rank feasible startups for an investor."""
+    timer = StageTimer("matches/investors")
+    investor_result = await db.execute(
+        select(InvestorProfile).where(InvestorProfile.user_id == user_id)
+    )
+    investor = investor_result.scalars().first()
+    if not investor:
+        return []
+    await match_index.ensure_loaded(db)
+    
+    matches = []
+    # Only score startups that pass this investor's hard filters
+    async for startup in stream_scalars(db, feasible_startups_query(investor)):
+        timer.lap("load")
+        if not passes_hard_filters(startup, investor):
+            continue
+        match_result = await match_startup_to_investor(
+            db, str(startup.user_id), user_id,
+            startup=startup, investor=investor
+        )
+        if "error" not in match_result:
+            matches.append({
+                "startup_id": str(startup.user_id),
+                "name": startup.name,
+                "tagline": startup.tagline,
+                "industry": startup.industry,
+                **match_result
+            })
+        timer.lap("score")
+    timer.lap("load")
+    
+    matches.sort(key=lambda x: x["match_percentage"], reverse=True)
+    timer.lap("sort")
+    timer.observe()
+    return matches
+
+
+async def compute_startup_matches_for_talent(db: AsyncSession, user_id: str) -> List[Dict]:
+    """Rank all startups for a talent."""
+    timer = StageTimer("matches/startups")
+    talent_result = await db.execute(
+        select(TalentProfile).where(TalentProfile.user_id == user_id)
+    )
+    talent = talent_result.scalars().first()
+    if not talent:
+        return []
+    await match_index.ensure_loaded(db)
+    
+    matches = []
+    async for startup in stream_scalars(db, select(StartupProfile)):
+        timer.lap("load")
+        match_result = await match_talent_to_startup(
+            db, user_id, str(startup.user_id),
+            talent=talent, startup=startup
+        )
+        if "error" not in match_result:
+            matches.append({
+                "startup_id": str(startup.user_id),
+                "name": startup.name,
+                "tagline": startup.tagline,
+                "industry": startup.industry,
+                **match_result
+            })
+        timer.lap("score")
+    timer.lap("load")
+    
+    matches.sort(key=lambda x: x["match_percentage"], reverse=True)
+    timer.lap("sort")
+    timer.observe()
+    
+    return matches
+
+
+@router.get("/talent", response_model=List[TalentMatch])
+async def get_talent_matches(
+    request: Request,
+    response: Response,
+    job_id: Optional[str] = None,
+    format: Optional[str] = FORMAT_QUERY,
+    current_user: User = Depends(get_current_user_claims)
+):
+    """Get matched talent for founder's startup or specific job."""
+    if current_user.role != UserRole.FOUNDER:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    if settings.USE_MOCK_DATA:
+        return MOCK_TALENT_MATCHES
+    
+    user_id = str(current_user.id)
+    return await serve_ranking(
+        request, response, user_id, "matches/talent", {"job_id": job_id}, TALENT_MATCH_DOMAINS,
+        lambda: run_with_session(compute_talent_matches, user_id, job_id),
+        format, TALENT_MATCHES
+    )
+
+
+@router.get("/investors", response_model=Union[List[InvestorMatch], List[StartupMatch]])
 async def get_investor_matches(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    format: Optional[str] = FORMAT_QUERY,
+    current_user: User = Depends(get_current_user_claims)
 ):
     """Get matched investors for founder's startup or matched startups for investor."""
+    user_id = str(current_user.id)
     if current_user.role == UserRole.FOUNDER:
         if settings.USE_MOCK_DATA:
             return MOCK_INVESTOR_MATCHES
         
-        # Get all investor profiles
-        investor_result = await db.execute(select(InvestorProfile))
-        all_investors = investor_result.scalars().all()
-        
-        matches = []
-        for investor in all_investors:
-            match_result = await match_startup_to_investor(db, str(current_user.id), str(investor.user_id))
-            if "error" not in match_result:
-                matches.append({
-                    "investor_id": str(investor.user_id),
-                    "name": investor.name,
-                    "fund": investor.fund,
-                    "type": investor.type,
-                    **match_result
-                })
-        
-        matches.sort(key=lambda x: x["match_percentage"], reverse=True)
-        return matches
+        compute = lambda: run_with_session(compute_investor_matches_for_founder, user_id)
 
     elif current_user.role == UserRole.INVESTOR:
         if settings.USE_MOCK_DATA:
             return MOCK_STARTUP_MATCHES
             
-        # Get all startup profiles
-        startup_result = await db.execute(select(StartupProfile))
-        all_startups = startup_result.scalars().all()
-        
-        matches = []
-        for startup in all_startups:
-            match_result = await match_startup_to_investor(db, str(startup.user_id), str(current_user.id))
-            if "error" not in match_result:
-                matches.append({
-                    "startup_id": str(startup.user_id),
-                    "name": startup.name,
-                    "tagline": startup.tagline,
-                    "industry": startup.industry,
-                    **match_result
-                })
-        
-        matches.sort(key=lambda x: x["match_percentage"], reverse=True)
-        return matches
+        compute = lambda: run_with_session(compute_startup_matches_for_investor, user_id)
     
     else:
         raise HTTPException(status_code=403, detail="Access denied")
+    
+    return await serve_ranking(
+        request, response, user_id, "matches/investors", {}, INVESTOR_MATCH_DOMAINS, compute, format,
+        INVESTOR_MATCHES
+    )
 
 
-@router.get("/startups")
+@router.get("/startups", response_model=List[StartupMatch])
 async def get_startup_matches(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    format: Optional[str] = FORMAT_QUERY,
+    current_user: User = Depends(get_current_user_claims)
 ):
     """Get matched startups for talent."""
     if current_user.role != UserRole.TALENT:
@@ -168,30 +455,18 @@ async def get_startup_matches(
     if settings.USE_MOCK_DATA:
         return MOCK_STARTUP_MATCHES
     
-    startup_result = await db.execute(select(StartupProfile))
-    all_startups = startup_result.scalars().all()
-    
-    matches = []
-    for startup in all_startups:
-        match_result = await match_talent_to_startup(db, str(current_user.id), str(startup.user_id))
-        if "error" not in match_result:
-            matches.append({
-                "startup_id": str(startup.user_id),
-                "name": startup.name,
-                "tagline": startup.tagline,
-                "industry": startup.industry,
-                **match_result
-            })
-    
-    matches.sort(key=lambda x: x["match_percentage"], reverse=True)
-    
-    return matches
+    user_id = str(current_user.id)
+    return await serve_ranking(
+        request, response, user_id, "matches/startups", {}, STARTUP_MATCH_DOMAINS,
+        lambda: run_with_session(compute_startup_matches_for_talent, user_id),
+        format, STARTUP_MATCHES
+    )
 
 
-@router.post("/connections/request")
+@router.post("/connections/request", response_model=ConnectionRequestResponse)
 async def request_connection(
     request: ConnectionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """Send a connection request."""
@@ -211,10 +486,10 @@ async def request_connection(
     return {"message": "Connection request sent", "match_id": str(new_match.id)}
 
 
-@router.get("/applicants/{job_id}")
+@router.get("/applicants/{job_id}", response_model=List[Applicant])
 async def get_job_applicants(
     job_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """Get talents who expressed interest in a specific job."""
@@ -255,42 +530,41 @@ async def get_job_applicants(
     return applicants
 
 
-@router.get("/jobs")
-async def get_job_matches(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get matched jobs for talent, ranked by skill overlap."""
-    if current_user.role != UserRole.TALENT:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    if settings.USE_MOCK_DATA:
-        return MOCK_STARTUP_MATCHES
-    
+async def compute_job_matches(db: AsyncSession, user_id: str) -> List[Dict]:
+    """Rank every job posting for a talent."""
+    timer = StageTimer("matches/jobs")
     # Get talent profile to extract skills
     talent_result = await db.execute(
-        select(TalentProfile).where(TalentProfile.user_id == current_user.id)
+        select(TalentProfile).where(TalentProfile.user_id == user_id)
     )
     talent = talent_result.scalars().first()
-    talent_skills = set()
-    if talent and talent.skills:
-        # skills is [{name: str, proficiency: str}, ...]
-        talent_skills = {s["name"].lower() for s in talent.skills if isinstance(s, dict) and "name" in s}
+    talent_bits = encode_skills(talent.skills) if talent else 0
 
     result = await db.execute(
         select(JobPosting).options(joinedload(JobPosting.startup))
     )
     all_jobs = result.scalars().all()
+    await match_index.ensure_loaded(db)
+    timer.lap("load")
+    
+    # Skill overlap for every job at once from bitset popcounts
+    overlaps = overlap_many(talent_bits, [encode_skills(job.required_skills) for job in all_jobs])
+    
+    # Semantic similarity to every embedded job from one matrix product
+    talent_vector = blended_talent_vector(user_id)
+    semantic_scores = (
+        match_index.job_similarities(talent_vector, [str(job.id) for job in all_jobs])
+        if talent_vector is not None else [None] * len(all_jobs)
+    )
     
     matches = []
-    for job in all_jobs:
-        # Calculate skill overlap
-        job_skills = set(s.lower() for s in (job.required_skills or []))
-        if job_skills and talent_skills:
-            overlap = len(talent_skills & job_skills)
-            skill_score = min(100, int((overlap / len(job_skills)) * 100))
+    for job, (overlap, job_skill_count), semantic_score in zip(all_jobs, overlaps, semantic_scores):
+        if job_skill_count and talent_bits:
+            skill_score = min(100, int((overlap / job_skill_count) * 100))
         else:
             skill_score = 50  # neutral score if no skills defined
+        if semantic_score is not None:
+            skill_score = round(skill_score * 0.6 + max(semantic_score, 0.0) * 100 * 0.4, 2)
         
         matches.append({
             "job_id": str(job.id),
@@ -307,14 +581,39 @@ async def get_job_matches(
             "match_percentage": skill_score,
         })
     
+    timer.lap("score")
+    
     # Sort by skill match score descending
     matches.sort(key=lambda x: x["match_percentage"], reverse=True)
+    timer.lap("sort")
+    timer.observe()
     return matches
 
 
-@router.get("/connections")
+@router.get("/jobs", response_model=List[JobMatch])
+async def get_job_matches(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_claims)
+):
+    """Get matched jobs for talent, ranked by skill overlap and job embedding similarity."""
+    if current_user.role != UserRole.TALENT:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    if settings.USE_MOCK_DATA:
+        return MOCK_JOB_MATCHES
+    
+    user_id = str(current_user.id)
+    return await serve_ranking(
+        request, response, user_id, "matches/jobs", {}, JOB_MATCH_DOMAINS,
+        lambda: run_with_session(compute_job_matches, user_id),
+        adapter=JOB_MATCHES
+    )
+
+
+@router.get("/connections", response_model=ConnectionsResponse)
 async def get_connections(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all connections (sent and received)."""
@@ -1,21 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, File, UploadFile, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 from database import get_db
 from models import User, TalentProfile, UserRole
 from dependencies import get_current_user
+from http_cache import make_etag, etag_matches, not_modified, set_etag
 from matching import generate_embedding, store_embedding
+from cache import data_versions
+from uploads import save_upload, content_key, UploadTooLarge
+from storage import get_storage
+from cv_text import index_cv
 from datetime import datetime
 from config import settings
 from mock_data import MOCK_TALENT_PROFILE
-import os
-import shutil
-import uuid
+import hashlib
+import hmac
+import re
+import time
 
 router = APIRouter()
 
+# The only keys a client may attach: content-addressed CVs, exactly as content_key builds them
+_CV_KEY = re.compile(rf"^{re.escape(settings.CV_UPLOAD_DIR)}/[0-9a-f]{{64}}\.(pdf|docx?)$")
+
+
+class CVUploadRequest(BaseModel):
+    filename: str
+    content_type: str = "application/pdf"
+    size: int = Field(gt=0)
+    sha256: str = Field(pattern="^[0-9a-f]{64}$")  # Hex digest of the file, computed by the client
+
+
+class CVConfirmRequest(BaseModel):
+    cv_path: str
+    upload_token: Optional[str] = None  # From POST /talent/cv/upload-url
+
 
 class TalentProfileUpdate(BaseModel):
     name: Optional[str] = None
@@ -29,6 +50,8 @@ class TalentProfileUpdate(BaseModel):
 
 @router.get("/profile")
 async def get_talent_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -59,6 +82,12 @@ async def get_talent_profile(
     if not profile:
         return {"message": "Profile not created yet"}
     
+    # Revalidation: the profile only changes when updated_at does
+    etag = make_etag(str(profile.id), profile.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     return {
         "id": str(profile.id),
         "user_id": str(profile.user_id),
@@ -113,12 +142,14 @@ async def update_talent_profile(
     profile_text = f"{profile.name or ''} {profile.headline or ''} {profile.bio or ''} {' '.join(skill_names)}"
     embedding = await generate_embedding(profile_text)
     await store_embedding(db, str(current_user.id), embedding, "profile")
+    await data_versions.bump("talent")
     
     return {"message": "Profile updated", "completeness_score": profile.completeness_score}
 
 
 @router.post("/upload-cv")
 async def upload_cv(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -127,27 +158,157 @@ async def upload_cv(
     if current_user.role != UserRole.TALENT:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    # Ensure cv directory exists
-    cv_dir = os.path.join(os.getcwd(), "cv")
-    if not os.path.exists(cv_dir):
-        os.makedirs(cv_dir)
+    if file.size is not None and file.size > settings.CV_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"CV exceeds {settings.CV_MAX_BYTES} bytes")
     
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1]
-    filename = f"{current_user.id}_{uuid.uuid4().hex}{file_ext}"
-    file_path = os.path.join(cv_dir, filename)
+    # Stream to disk in chunks without blocking the event loop; identical files are stored once
+    try:
+        stored = await save_upload(
+            file, settings.CV_UPLOAD_DIR, settings.CV_MAX_BYTES, settings.UPLOAD_CHUNK_BYTES,
+            staging_dir=settings.UPLOAD_STAGING_DIR,
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"CV exceeds {settings.CV_MAX_BYTES} bytes")
+    cv_path = stored.key
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Update profile with the storage key
+    await _set_cv_path(db, current_user, cv_path, background_tasks)
     
-    # Update profile with relative path
+    return {
+        "message": "CV uploaded successfully",
+        "cv_path": cv_path,
+        "size": stored.size,
+        "sha256": stored.sha256,
+        "deduplicated": stored.deduplicated,
+    }
+
+
+async def _set_cv_path(db: AsyncSession, current_user: User, cv_path: str, background_tasks: BackgroundTasks):
     result = await db.execute(
         select(TalentProfile).where(TalentProfile.user_id == current_user.id)
     )
     profile = result.scalar_one_or_none()
     if profile:
-        profile.cv_path = f"cv/{filename}"
+        profile.cv_path = cv_path
+        profile.updated_at = datetime.utcnow().isoformat()
         await db.commit()
+        # Text extraction and the 'cv' embedding happen after the response is sent
+        background_tasks.add_task(index_cv, str(current_user.id), cv_path)
+
+
+def _sign_upload(user_id: str, cv_path: str, issued: int) -> str:
+    message = f"{user_id}\n{cv_path}\n{issued}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _upload_token(user_id: str, cv_path: str) -> str:
+    """Ties a presigned upload to the talent who asked for it (checked by /cv/confirm)."""
+    issued = int(time.time())
+    return f"{issued}.{_sign_upload(user_id, cv_path, issued)}"
+
+
+def _upload_token_issued(token: Optional[str], user_id: str, cv_path: str) -> Optional[int]:
+    """Issue time of a valid, unexpired upload token for this user and key, else None."""
+    issued, _, signature = (token or "").partition(".")
+    if not issued.isdigit() or not hmac.compare_digest(signature, _sign_upload(user_id, cv_path, int(issued))):
+        return None
+    # Confirm may follow an upload that started just before the URL expired
+    if int(issued) + 2 * settings.PRESIGNED_URL_TTL_SECONDS < time.time():
+        return None
+    return int(issued)
+
+
+async def _current_cv_path(db: AsyncSession, user_id) -> Optional[str]:
+    result = await db.execute(select(TalentProfile.cv_path).where(TalentProfile.user_id == user_id))
+    return result.scalar_one_or_none()
+
+
+@router.post("/cv/upload-url")
+async def create_cv_upload_url(
+    request: CVUploadRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Presigned URL for uploading a CV straight to storage.
+
+    CVs are stored under their sha256. The upload can only be skipped
+    (`upload` is null) when this talent's profile already has that CV; knowing
+    a hash is not proof of having the file. Finish with POST /talent/cv/confirm,
+    passing the returned `upload_token`.
+    """
+    if current_user.role != UserRole.TALENT:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if request.size > settings.CV_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"CV exceeds {settings.CV_MAX_BYTES} bytes")
     
-    return {"message": "CV uploaded successfully", "cv_path": f"cv/{filename}"}
+    cv_path = content_key(settings.CV_UPLOAD_DIR, request.sha256, request.filename)
+    if not _CV_KEY.match(cv_path):
+        raise HTTPException(status_code=400, detail="CV must be a PDF, DOC or DOCX file")
+    if await _current_cv_path(db, current_user.id) == cv_path:
+        return {"cv_path": cv_path, "upload": None, "deduplicated": True}
+    
+    upload = get_storage().presign_put(
+        cv_path, request.content_type, request.size, request.sha256, settings.PRESIGNED_URL_TTL_SECONDS
+    )
+    return {
+        "cv_path": cv_path,
+        "upload": upload,
+        "upload_token": _upload_token(str(current_user.id), cv_path),
+        "expires_in": settings.PRESIGNED_URL_TTL_SECONDS,
+        "deduplicated": False,
+    }
+
+
+@router.post("/cv/confirm")
+async def confirm_cv_upload(
+    request: CVConfirmRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach a CV uploaded through a presigned URL to the talent profile.
+
+    Accepted only for a key presigned for this talent and written after the
+    URL was issued, or for the CV the profile already has.
+    """
+    if current_user.role != UserRole.TALENT:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if not _CV_KEY.match(request.cv_path):
+        raise HTTPException(status_code=400, detail="Invalid CV path")
+    
+    storage = get_storage()
+    if await _current_cv_path(db, current_user.id) != request.cv_path:
+        issued = _upload_token_issued(request.upload_token, str(current_user.id), request.cv_path)
+        if issued is None:
+            raise HTTPException(status_code=403, detail="Invalid or expired upload token")
+        modified = await storage.modified(request.cv_path)
+        if modified is None or modified < issued:
+            raise HTTPException(status_code=404, detail="CV has not been uploaded")
+    
+    size = await storage.size(request.cv_path)
+    if size is None:
+        raise HTTPException(status_code=404, detail="CV has not been uploaded")
+    if size > settings.CV_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"CV exceeds {settings.CV_MAX_BYTES} bytes")
+    
+    await _set_cv_path(db, current_user, request.cv_path, background_tasks)
+    return {"message": "CV uploaded successfully", "cv_path": request.cv_path, "size": size}
+
+
+@router.get("/cv/download-url")
+async def get_cv_download_url(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Short-lived presigned URL for the current talent's CV."""
+    if current_user.role != UserRole.TALENT:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    cv_path = await _current_cv_path(db, current_user.id)
+    if not cv_path:
+        raise HTTPException(status_code=404, detail="No CV uploaded")
+    
+    return {
+        "url": get_storage().presign_get(cv_path, settings.PRESIGNED_URL_TTL_SECONDS),
+        "expires_in": settings.PRESIGNED_URL_TTL_SECONDS,
+    }
@@ -0,0 +1,168 @@
+"""Wall-clock stack sampling in collapsed ("folded") format for flame graphs.
+
+Samples are taken by a background thread from `sys._current_frames()`, so
+nothing is instrumented and nothing runs while no sampler is active. The
+output is one `frame;frame;frame count` line per distinct stack, readable by
+flamegraph.pl, inferno and speedscope.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 128
+
+# Leaf frames of threads that are waiting rather than working
+_IDLE_FILES = ("selectors.py", "threading.py", "queue.py", "concurrent/futures/thread.py", "logging/handlers.py")
+IDLE = "<idle>"
+
+
+def _frame_label(code) -> str:
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_qualname} ({'/'.join(parts[-2:])})"
+
+
+def collapse(frame) -> Optional[str]:
+    """Root-first stack of `frame` joined with ';', or None for an idle thread."""
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Samples the stacks of every thread at `interval` seconds until stopped.
+
+    Idle threads are skipped, except the event loop thread (`loop_thread_id`),
+    whose idle time is kept as one `<idle>` frame so the profile shows how much
+    of the wall time the loop had nothing to run.
+    """
+
+    def __init__(self, interval: float, loop_thread_id: Optional[int] = None):
+        self.interval = interval
+        self.loop_thread_id = loop_thread_id
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._names.get(ident)
+        if name is None:
+            self._names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._names.get(ident, str(ident))
+        return name
+
+    def sample(self):
+        own = threading.get_ident()
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = collapse(frame)
+            if stack is None:
+                if ident != self.loop_thread_id:
+                    continue
+                stack = IDLE
+            stacks.append(f"{self._thread_name(ident)};{stack}")
+        with self._lock:
+            self.samples += 1
+            self.counts.update(stacks)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+            self.on_tick()
+
+    def on_tick(self):
+        """Hook for subclasses, called after each sample in the sampler thread."""
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def take(self) -> Counter:
+        """Return the stacks collected so far and start over."""
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+            self.samples = 0
+        return counts
+
+
+def render_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+class PeriodicProfiler(StackSampler):
+    """Low-rate always-on sampling, flushed to `output_dir` every `flush_seconds`."""
+
+    def __init__(self, interval: float, flush_seconds: float, output_dir: str, max_files: int,
+                 loop_thread_id: Optional[int] = None):
+        super().__init__(interval, loop_thread_id)
+        self.flush_seconds = flush_seconds
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self._last_flush = time.monotonic()
+
+    def on_tick(self):
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        counts = self.take()
+        if not counts:
+            return
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S.folded", time.gmtime()))
+            with open(path, "w") as f:
+                f.write(render_collapsed(counts))
+            self._prune()
+        except OSError as e:
+            logger.warning("Could not write profile to %s: %s", self.output_dir, e)
+
+    def _prune(self):
+        files = sorted(name for name in os.listdir(self.output_dir) if name.endswith(".folded"))
+        for name in files[:-self.max_files] if self.max_files > 0 else []:
+            os.remove(os.path.join(self.output_dir, name))
+
+    def stop(self):
+        super().stop()
+        self.flush()
+
+
+_periodic: Optional[PeriodicProfiler] = None
+
+
+def start_periodic_profiler(interval: float, flush_seconds: float, output_dir: str, max_files: int):
+    """Start the process-wide low-rate profiler; call from the event loop thread."""
+    global _periodic
+    if _periodic is None:
+        _periodic = PeriodicProfiler(
+            interval, flush_seconds, output_dir, max_files, loop_thread_id=threading.get_ident()
+        ).start()
+
+
+def stop_periodic_profiler():
+    global _periodic
+    if _periodic is not None:
+        _periodic.stop()
+        _periodic = None
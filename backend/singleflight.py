@@ -0,0 +1,49 @@
+"""Coalesce identical concurrent computations into one in-flight task."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Share one running computation between concurrent callers with the same key.
+
+    The computation runs as its own task and callers await it through
+    `asyncio.shield`, so a caller that is cancelled (e.g. the client
+    disconnected) stops waiting without cancelling the shared work.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved so an orphaned failure isn't logged as unhandled
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "coalesced_ratio": round(self.followers / total, 4) if total else 0.0,
+        }
+
+
+match_flights = SingleFlight()
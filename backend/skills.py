@@ -0,0 +1,212 @@
+"""Skill vocabulary - maps normalized skill names to integer ids and bitsets."""
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Aliases folded onto one canonical skill name before an id is assigned
+SKILL_SYNONYMS: Dict[str, str] = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "react js": "react",
+    "nodejs": "node",
+    "node.js": "node",
+    "node js": "node",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "nextjs": "next",
+    "next.js": "next",
+    "expressjs": "express",
+    "express.js": "express",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "ui/ux": "ux design",
+    "ux": "ux design",
+    "ui": "ui design",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+}
+
+# Seeded first so common skills get stable, low (compact) bit positions
+CANONICAL_SKILLS: Tuple[str, ...] = (
+    "javascript", "typescript", "python", "java", "go", "rust", "c++", "c#", "ruby", "php", "swift", "kotlin",
+    "react", "vue", "angular", "next", "node", "express", "django", "flask", "fastapi", "spring", "rails",
+    "html", "css", "tailwind", "graphql", "rest",
+    "sql", "postgresql", "mysql", "mongodb", "redis", "elasticsearch",
+    "aws", "google cloud", "azure", "docker", "kubernetes", "terraform", "linux", "devops",
+    "machine learning", "artificial intelligence", "deep learning", "data science", "data engineering",
+    "nlp", "computer vision", "pytorch", "tensorflow",
+    "ios", "android", "react native", "flutter",
+    "ux design", "ui design", "figma", "product management", "marketing", "sales", "growth",
+    "finance", "operations", "blockchain", "security",
+)
+
+# User-supplied skills get their own bit until the vocabulary holds MAX_SKILLS names;
+# rarer ones past that share OVERFLOW_BITS hashed positions, so the width stays bounded
+MAX_SKILLS = 4096
+OVERFLOW_BITS = 512
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercase, collapse whitespace and resolve synonyms."""
+    name = _WHITESPACE.sub(" ", (skill or "").strip().lower())
+    return SKILL_SYNONYMS.get(name, name)
+
+
+class SkillVocabulary:
+    """Process-wide mapping of canonical skill names to bit positions.
+
+    Seeded with the canonical skill list. Names are user input, so at most
+    `max_skills` get a bit of their own; later ones hash into `overflow_bits`
+    shared positions, bounding both memory and bitset width.
+    """
+
+    def __init__(self, seed: Iterable[str] = (), max_skills: int = MAX_SKILLS, overflow_bits: int = OVERFLOW_BITS):
+        self.max_skills = max_skills
+        self.overflow_bits = overflow_bits
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._overflow_names: Dict[int, Optional[str]] = {}  # Name per shared position, None if ambiguous
+        for skill in seed:
+            self.id_for(skill)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def id_for(self, skill: str) -> int:
+        """Return the id of a skill, assigning a new one on first sight."""
+        name = normalize_skill(skill)
+        skill_id = self._ids.get(name)
+        if skill_id is not None:
+            return skill_id
+        if len(self._names) < self.max_skills:
+            skill_id = len(self._names)
+            self._ids[name] = skill_id
+            self._names.append(name)
+            return skill_id
+        skill_id = self.max_skills + zlib.crc32(name.encode()) % self.overflow_bits
+        if self._overflow_names.setdefault(skill_id, name) != name:
+            self._overflow_names[skill_id] = None  # Shared by several names: don't guess which
+        return skill_id
+
+    def name_for(self, skill_id: int) -> Optional[str]:
+        if skill_id < len(self._names):
+            return self._names[skill_id]
+        return self._overflow_names.get(skill_id)
+
+    def encode(self, skills: Iterable[str]) -> int:
+        """Pack a list of skills into an integer bitset."""
+        bits = 0
+        for skill in skills:
+            if skill and normalize_skill(skill):
+                bits |= 1 << self.id_for(skill)
+        return bits
+
+    def decode(self, bits: int) -> List[str]:
+        """Return the canonical skill names set in a bitset."""
+        names = []
+        while bits:
+            low = bits & -bits
+            name = self.name_for(low.bit_length() - 1)
+            if name:
+                names.append(name)
+            bits ^= low
+        return names
+
+
+vocabulary = SkillVocabulary(seed=list(CANONICAL_SKILLS) + sorted(set(SKILL_SYNONYMS.values())))
+
+
+@lru_cache(maxsize=8192)
+def _encode_cached(skills: Tuple[str, ...]) -> int:
+    return vocabulary.encode(skills)
+
+
+def skill_names(skills) -> List[str]:
+    """Extract skill names from `[{name, proficiency}]` or plain string lists."""
+    names = []
+    for s in (skills or []):
+        if isinstance(s, dict):
+            names.append(s.get("name", ""))
+        elif isinstance(s, str):
+            names.append(s)
+    return names
+
+
+def encode_skills(skills) -> int:
+    """Bitset for a profile or job skill list (memoized per distinct list)."""
+    return _encode_cached(tuple(skill_names(skills)))
+
+
+def jaccard_bits(a: int, b: int) -> float:
+    """Jaccard similarity of two skill bitsets."""
+    if not a or not b:
+        return 0.0
+    return (a & b).bit_count() / (a | b).bit_count()
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 element (SWAR; numpy < 2 has no bitwise_count)."""
+    words = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (words * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+@lru_cache(maxsize=32)
+def _packed(candidates: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """Candidate bitsets as a (rows, uint64 words) matrix plus their popcounts.
+
+    Cached per candidate column, so ranking many talents against the same
+    jobs packs the column once.
+    """
+    words = max(1, (max(c.bit_length() for c in candidates) + 63) // 64)
+    raw = b"".join(c.to_bytes(words * 8, "little") for c in candidates)
+    matrix = np.frombuffer(raw, dtype=np.uint64).reshape(len(candidates), words)
+    return matrix, _popcount(matrix).sum(axis=1, dtype=np.int64)
+
+
+def _overlap_arrays(query: int, candidates: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Intersection popcounts with `query` and candidate popcounts, for a whole column at once."""
+    matrix, sizes = _packed(tuple(candidates))
+    q = np.frombuffer(query.to_bytes(max(matrix.shape[1], (query.bit_length() + 63) // 64) * 8, "little"),
+                      dtype=np.uint64)[:matrix.shape[1]]
+    # Only the words where the query has bits can intersect
+    columns = np.flatnonzero(q)
+    intersections = _popcount(matrix[:, columns] & q[columns]).sum(axis=1, dtype=np.int64)
+    return intersections, sizes
+
+
+def jaccard_many(query: int, candidates: Sequence[int]) -> List[float]:
+    """Jaccard similarity of one bitset against a whole candidate column."""
+    if not query or not candidates:
+        return [0.0] * len(candidates)
+    intersections, sizes = _overlap_arrays(query, candidates)
+    unions = query.bit_count() + sizes - intersections
+    scores = np.divide(intersections, unions, out=np.zeros(len(candidates)), where=sizes > 0)
+    return scores.tolist()
+
+
+def overlap_many(query: int, candidates: Sequence[int]) -> List[Tuple[int, int]]:
+    """(intersection, candidate size) popcounts for a whole candidate column."""
+    if not candidates:
+        return []
+    intersections, sizes = _overlap_arrays(query, candidates)
+    return list(zip(intersections.tolist(), sizes.tolist()))
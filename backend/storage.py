@@ -0,0 +1,219 @@
+"""File storage backends (local filesystem or S3-compatible) with presigned URLs."""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import quote, urlencode
+
+from config import settings
+
+
+class StorageError(Exception):
+    """Invalid key or a backend failure."""
+
+
+def _checksum_b64(sha256_hex: str) -> str:
+    return base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+
+
+class LocalStorage:
+    """Objects are files under `root`; presigned URLs point at the signed /files routes.
+
+    Meant for development and single-instance deployments: the bytes still go
+    through an API worker, but clients use the same presigned flow as with S3.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str, base_url: str, secret: str):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.base_url = base_url.rstrip("/")
+        self._secret = (secret or "").encode()
+
+    def path(self, key: str) -> str:
+        # Keys are relative and already normalized; anything with "..", "." or "//" segments is refused
+        if not key or os.path.isabs(key) or os.path.normpath(key) != key or key.startswith(".."):
+            raise StorageError(f"Invalid key: {key}")
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid key: {key}")
+        return path
+
+    async def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, or None if it doesn't exist."""
+        try:
+            return (await asyncio.to_thread(os.stat, self.path(key))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def modified(self, key: str) -> Optional[float]:
+        """Unix time of the last write to the object, or None if it doesn't exist."""
+        try:
+            return (await asyncio.to_thread(os.stat, self.path(key))).st_mtime
+        except FileNotFoundError:
+            return None
+
+    async def put_file(self, src_path: str, key: str, content_type: Optional[str] = None) -> bool:
+        """Move a local file into storage; returns True if the key already existed."""
+        dest = self.path(key)
+
+        def move() -> bool:
+            if os.path.exists(dest):
+                os.remove(src_path)
+                # Identical content: count it as written now, like an S3 overwrite
+                os.utime(dest)
+                return True
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.move(src_path, dest)
+            return False
+
+        return await asyncio.to_thread(move)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        """Path of the object on local disk for the duration of the block."""
+        yield self.path(key)
+
+    def _sign(self, method: str, key: str, params: Dict[str, str]) -> str:
+        canonical = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return hmac.new(self._secret, f"{method}\n{key}\n{canonical}".encode(), hashlib.sha256).hexdigest()
+
+    def verify(self, method: str, key: str, params: Dict[str, str]) -> bool:
+        """Check a signed URL's query parameters (including `expires` and `signature`)."""
+        params = dict(params)
+        signature = params.pop("signature", "")
+        if not params.get("expires", "").isdigit() or int(params["expires"]) < time.time():
+            return False
+        return hmac.compare_digest(self._sign(method, key, params), signature)
+
+    def _url(self, method: str, key: str, ttl: int, params: Dict[str, str]) -> str:
+        params = {**params, "expires": str(int(time.time()) + ttl)}
+        params["signature"] = self._sign(method, key, params)
+        return f"{self.base_url}/files/{quote(key)}?{urlencode(params)}"
+
+    def presign_put(self, key: str, content_type: str, size: int, sha256_hex: str, ttl: int) -> Dict:
+        url = self._url("PUT", key, ttl, {"size": str(size), "sha256": sha256_hex})
+        return {"method": "PUT", "url": url, "headers": {"Content-Type": content_type}}
+
+    def presign_get(self, key: str, ttl: int) -> str:
+        return self._url("GET", key, ttl, {})
+
+
+class S3Storage:
+    """S3 (or any S3-compatible service such as MinIO via `endpoint_url`)."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, region: str, endpoint_url: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None):
+        # Imported here so boto3 stays out of app import time when S3 isn't used
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"}),
+        )
+
+    async def _head(self, key: str) -> Optional[Dict]:
+        from botocore.exceptions import ClientError
+        try:
+            return await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise StorageError(str(e)) from e
+
+    async def size(self, key: str) -> Optional[int]:
+        head = await self._head(key)
+        return head["ContentLength"] if head else None
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def modified(self, key: str) -> Optional[float]:
+        """Unix time of the last write to the object, or None if it doesn't exist."""
+        head = await self._head(key)
+        return head["LastModified"].timestamp() if head else None
+
+    async def put_file(self, src_path: str, key: str, content_type: Optional[str] = None) -> bool:
+        """Upload a local file (then delete it); returns True if the key already existed."""
+        try:
+            if await self.exists(key):
+                return True
+            extra = {"ContentType": content_type} if content_type else None
+            await asyncio.to_thread(self.client.upload_file, src_path, self.bucket, key, ExtraArgs=extra)
+            return False
+        finally:
+            await asyncio.to_thread(os.remove, src_path)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        """Download the object to the staging directory and remove it after the block."""
+        await asyncio.to_thread(os.makedirs, settings.UPLOAD_STAGING_DIR, exist_ok=True)
+        path = os.path.join(settings.UPLOAD_STAGING_DIR, f"download-{uuid.uuid4().hex}")
+        try:
+            await asyncio.to_thread(self.client.download_file, self.bucket, key, path)
+            yield path
+        finally:
+            if os.path.exists(path):
+                await asyncio.to_thread(os.remove, path)
+
+    def presign_put(self, key: str, content_type: str, size: int, sha256_hex: str, ttl: int) -> Dict:
+        # Signing the length and checksum makes S3 reject bodies that differ from what was approved
+        checksum = _checksum_b64(sha256_hex)
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=ttl,
+        )
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum},
+        }
+
+    def presign_get(self, key: str, ttl: int) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=ttl
+        )
+
+
+_storage = None
+
+
+def get_storage():
+    """Process-wide storage backend selected by STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _storage = S3Storage(
+                bucket=settings.S3_PRIVATE_BUCKET,
+                region=settings.AWS_REGION,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                access_key=settings.AWS_ACCESS_KEY_ID,
+                secret_key=settings.AWS_SECRET_ACCESS_KEY,
+            )
+        else:
+            _storage = LocalStorage(settings.LOCAL_STORAGE_ROOT, settings.PUBLIC_BASE_URL, settings.SECRET_KEY)
+    return _storage
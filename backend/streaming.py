@@ -0,0 +1,94 @@
+"""Streaming helpers: newline-delimited JSON and server-sent events."""
+import json
+from typing import AsyncIterable, Iterable, Iterator, Optional, Tuple, Union
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+async def _encode_rows(rows: Union[AsyncIterable[dict], Iterable[dict]]):
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield orjson.dumps(row) + b"\n"
+    else:
+        for row in rows:
+            yield orjson.dumps(row) + b"\n"
+
+
+def ndjson_response(
+    rows: Union[AsyncIterable[dict], Iterable[dict]],
+    headers: Optional[dict] = None
+) -> StreamingResponse:
+    """Stream rows as NDJSON, one JSON object per line, as they are produced."""
+    return StreamingResponse(_encode_rows(rows), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def sse_event(event: str, data) -> bytes:
+    """Encode one server-sent event with a JSON payload."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def sse_response(events: AsyncIterable[bytes]) -> StreamingResponse:
+    """Stream pre-encoded server-sent events."""
+    return StreamingResponse(
+        events,
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class JSONSectionParser:
+    """Incrementally parse the members of a streamed top-level JSON object.
+
+    Feed text chunks as they arrive; each call returns the (key, value) pairs
+    completed so far. Anything before the opening brace (such as a markdown
+    code fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> Iterator[Tuple[str, object]]:
+        self._buf += chunk
+        while self._pos < len(self._buf) and not self.done:
+            ch = self._buf[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._depth > 0:
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1 and ch == "{":
+                    self._member_start = self._pos + 1
+            elif ch in "}]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    yield from self._complete_member()
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                yield from self._complete_member()
+                self._member_start = self._pos + 1
+            self._pos += 1
+
+    def _complete_member(self) -> Iterator[Tuple[str, object]]:
+        member = self._buf[self._member_start:self._pos].strip()
+        if not member:
+            return
+        try:
+            yield from json.loads("{" + member + "}").items()
+        except ValueError:
+            pass
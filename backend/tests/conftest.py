@@ -0,0 +1,44 @@
+"""Test setup: run against a throwaway SQLite database with the fake LLM."""
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="neplaunch-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("USE_FAKE_LLM", "true")
+os.environ.setdefault("LOCAL_STORAGE_ROOT", os.path.join(_DB_DIR, "storage"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient for the full app, once its startup phases have finished."""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        deadline = time.monotonic() + 10
+        while test_client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, test_client.get("/readyz").json()
+            time.sleep(0.05)
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    """Register a user with the given role and return its auth headers."""
+    count = [0]
+
+    def register_user(role: str):
+        count[0] += 1
+        email = f"{role.lower()}-{time.time_ns()}-{count[0]}@example.com"
+        response = client.post("/auth/register", json={"email": email, "password": "pw", "role": role})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return register_user
@@ -0,0 +1,13 @@
+"""Oversized uploads are refused with a 413 that browsers can read."""
+from config import settings
+
+
+def test_oversized_upload_413_has_cors_headers(client):
+    origin = settings.CORS_ORIGINS[0]
+    response = client.post(
+        "/talent/upload-cv",
+        content=b"x" * (settings.CV_MAX_BYTES + 128 * 1024),
+        headers={"Origin": origin, "Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == origin
@@ -0,0 +1,24 @@
+"""Per-process data versions must not validate ETags forever."""
+import asyncio
+
+import cache
+from cache import DataVersions
+
+
+def test_local_snapshot_expires(monkeypatch):
+    versions = DataVersions(local_ttl=60)
+    now = [1200.0]  # Start of a 60 s bucket
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+
+    first = asyncio.run(versions.snapshot(["talent"]))
+    now[0] += 30
+    assert asyncio.run(versions.snapshot(["talent"])) == first
+    now[0] += 60
+    assert asyncio.run(versions.snapshot(["talent"])) != first
+
+
+def test_bump_changes_snapshot():
+    versions = DataVersions(local_ttl=60)
+    before = asyncio.run(versions.snapshot(["talent"]))
+    asyncio.run(versions.bump("talent"))
+    assert asyncio.run(versions.snapshot(["talent"])) != before
@@ -0,0 +1,23 @@
+"""Accept-Encoding negotiation for CompressionMiddleware."""
+from middleware import choose_encoding, parse_accept_encoding
+
+
+def test_parse_q_values():
+    assert parse_accept_encoding("gzip, br;q=0.5, identity; q=0, deflate;q=x") == {
+        "gzip": 1.0, "br": 0.5, "identity": 0.0, "deflate": 0.0,
+    }
+
+
+def test_choose_encoding():
+    both = ("br", "gzip")
+    assert choose_encoding("gzip, deflate, br", both) == "br"
+    assert choose_encoding("br;q=0, gzip", both) == "gzip"
+    assert choose_encoding("br;q=0.2, gzip;q=0.8", both) == "gzip"
+    assert choose_encoding("gzip;q=0, br;q=0", both) is None
+    assert choose_encoding("*", both) == "br"
+    assert choose_encoding("*;q=0.1, gzip;q=0", both) == "br"
+    assert choose_encoding("x-gzip", both) == "gzip"
+    assert choose_encoding("", both) is None
+    # Substrings of other tokens don't count
+    assert choose_encoding("brotli-ish, gzipped", both) is None
+    assert choose_encoding("br", ("gzip",)) is None
@@ -0,0 +1,55 @@
+"""CV extraction workers: a timed-out parse is killed without affecting other CVs."""
+import asyncio
+import time
+
+import cv_text
+from config import settings
+
+
+def _extract(path, extension, max_chars):
+    if extension == "slow":
+        time.sleep(30)
+    if extension == "medium":
+        time.sleep(0.5)
+    return f"text of {path}"
+
+
+def _run(monkeypatch, workers, coro):
+    monkeypatch.setattr(settings, "CV_EXTRACT_WORKERS", workers)
+    monkeypatch.setattr(settings, "CV_EXTRACT_TIMEOUT_SECONDS", 1.0)
+    monkeypatch.setattr(cv_text, "extract_text", _extract)
+    monkeypatch.setattr(cv_text, "_extract_slots", None)
+    try:
+        return asyncio.run(coro())
+    finally:
+        cv_text.shutdown_extract_pool()
+
+
+def test_timeout_frees_the_worker(monkeypatch):
+    async def run():
+        try:
+            await cv_text._run_extract_job("stuck.pdf", "slow")
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("expected a timeout")
+        started = time.monotonic()
+        text = await cv_text._run_extract_job("next.pdf", "pdf")
+        return text, time.monotonic() - started
+
+    text, elapsed = _run(monkeypatch, 1, run)
+    assert text == "text of next.pdf"
+    assert elapsed < 1.0
+
+
+def test_timeout_spares_other_extractions(monkeypatch):
+    async def run():
+        return await asyncio.gather(
+            cv_text._run_extract_job("stuck.pdf", "slow"),
+            cv_text._run_extract_job("other.pdf", "medium"),
+            return_exceptions=True,
+        )
+
+    stuck, other = _run(monkeypatch, 2, run)
+    assert isinstance(stuck, asyncio.TimeoutError)
+    assert other == "text of other.pdf"
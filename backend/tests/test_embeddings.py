@@ -0,0 +1,28 @@
+"""A failed or rejected embedding call must not replace the stored vector."""
+import asyncio
+
+import matching
+from llm_gateway import GatewayRejected
+
+
+class _Embedder:
+    def embed_query(self, text):
+        return [1.0, 2.0]
+
+
+def test_rejected_call_keeps_stored_vector(monkeypatch):
+    async def embedder():
+        return _Embedder()
+
+    async def reject(model, fn, **kwargs):
+        raise GatewayRejected(model, "queue full")
+
+    monkeypatch.setattr(matching, "aget_embedder", embedder)
+    monkeypatch.setattr(matching.llm_gateway, "call", reject)
+    assert asyncio.run(matching.generate_embedding("founder profile")) is None
+
+    class _Session:
+        async def execute(self, *args):
+            raise AssertionError("store_embedding should not touch the database")
+
+    asyncio.run(matching.store_embedding(_Session(), "user-1", None, "profile"))
@@ -0,0 +1,16 @@
+"""Cold-start budget: `import main` stays fast and leaves the Gemini clients unloaded."""
+import os
+
+from check_import_time import DEFAULT_BUDGET_MS, LAZY_MODULES, measure
+
+
+def test_import_main_within_budget():
+    budget_ms = float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    total_us, modules = measure()
+
+    eager = sorted(name for name in modules if name.startswith(LAZY_MODULES))
+    assert not eager, f"imported at startup instead of on first use: {', '.join(eager[:5])}"
+    assert total_us / 1000 <= budget_ms, (
+        f"import main took {total_us / 1000:.1f} ms, over the {budget_ms:.0f} ms budget "
+        "(run `python check_import_time.py` for the heaviest modules)"
+    )
@@ -0,0 +1,47 @@
+"""The match index picks up embeddings written by other processes."""
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete
+
+from database import AsyncSessionLocal, Base, engine
+from match_index import MatchIndex
+from models import Embedding, User, UserRole
+
+
+async def _scenario():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Embedding))
+        for user_id in ("u1", "u2"):
+            await db.merge(User(id=user_id, email=f"{user_id}@x", password_hash="x", role=UserRole.TALENT))
+        db.add(Embedding(user_id="u1", text_source="profile", embedding=[1.0, 0.0],
+                         created_at=datetime.utcnow().isoformat()))
+        await db.commit()
+
+        index = MatchIndex(refresh_seconds=0)
+        await index.ensure_loaded(db)
+        assert index.get("u1", "profile") is not None
+
+        # Written by "another worker": only the database changes
+        db.add(Embedding(user_id="u2", text_source="profile", embedding=[0.0, 1.0],
+                         created_at=datetime.utcnow().isoformat()))
+        await db.commit()
+        await index.ensure_loaded(db)
+        assert index.get("u2", "profile") is not None
+
+        await db.execute(delete(Embedding).where(Embedding.user_id == "u1"))
+        await db.commit()
+        await index.ensure_loaded(db)
+        assert index.get("u1", "profile") is None
+        assert index.get("u2", "profile") is not None
+
+
+def test_refresh_sees_other_writers():
+    async def run():
+        try:
+            await _scenario()
+        finally:
+            await engine.dispose()
+    asyncio.run(run())
@@ -0,0 +1,45 @@
+"""Hard filters applied before investor-startup scoring."""
+from matching import geography_matches, passes_hard_filters
+from models import FundingStage, InvestorProfile, StartupProfile
+
+
+def _investor(**fields):
+    defaults = {"filter_stage": True, "filter_check_size": True, "filter_geography": False}
+    return InvestorProfile(**{**defaults, **fields})
+
+
+def test_stage_filter_excludes_other_stages():
+    investor = _investor(investment_stage=["Seed"])
+    assert passes_hard_filters(StartupProfile(stage=FundingStage.SEED), investor)
+    assert not passes_hard_filters(StartupProfile(stage=FundingStage.SERIES_B), investor)
+
+
+def test_unrecognized_stages_do_not_exclude():
+    # Free-text stages that don't map to FundingStage count as missing data
+    investor = _investor(investment_stage=["SaaS", "Growth"])
+    assert passes_hard_filters(StartupProfile(stage=FundingStage.SEED), investor)
+
+
+def test_check_size_filter():
+    investor = _investor(check_size_min=100, check_size_max=1000)
+    assert passes_hard_filters(StartupProfile(funding_goal=500), investor)
+    assert not passes_hard_filters(StartupProfile(funding_goal=5000), investor)
+    assert passes_hard_filters(StartupProfile(funding_goal=None), investor)
+
+
+def test_geography_matches_whole_words():
+    assert geography_matches("Nepal", "Kathmandu, Nepal")
+    assert geography_matches("Kathmandu, Nepal", "Nepal")
+    assert geography_matches("India; Nepal", "Pokhara, Nepal")
+    assert geography_matches("New York", "New York City, USA")
+    assert geography_matches("US", "Austin, US")
+    assert not geography_matches("US", "Australia")
+    assert not geography_matches("US", "Minsk, Belarus")
+    assert not geography_matches("India", "Indianapolis, Indiana")
+    assert not geography_matches("York", "New Jersey")
+
+
+def test_geography_missing_or_global_never_excludes():
+    assert geography_matches("Nepal", None)
+    assert geography_matches("Global", "Berlin")
+    assert geography_matches(None, "Berlin")
@@ -0,0 +1,37 @@
+"""MetricsMiddleware must finish streamed responses that complete in another task."""
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import metrics
+from middleware import MetricsMiddleware
+
+
+async def _stream(request):
+    async def lines():
+        for n in range(3):
+            yield f'{{"n": {n}}}\n'
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_streamed_response_is_recorded():
+    app = Starlette(routes=[Route("/stream", _stream)])
+    app.add_middleware(MetricsMiddleware)
+    labels = {"method": "GET", "route": "/stream", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    with TestClient(app, raise_server_exceptions=True) as client:
+        for _ in range(2):
+            response = client.get("/stream")
+            assert response.status_code == 200
+            assert response.text.count("\n") == 3
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert _sample("db_queries_per_request_count", route="/stream") >= 2
+    assert metrics.HTTP_IN_PROGRESS._value.get() == 0
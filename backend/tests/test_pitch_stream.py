@@ -0,0 +1,62 @@
+"""Streamed pitch feedback: incremental JSON parsing and the SSE event sequence (fake LLM)."""
+import json
+
+import orjson
+
+from fake_llm import DEFAULT_FEEDBACK
+from pitch_cache import pitch_feedback_store
+from streaming import JSONSectionParser
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], orjson.loads(lines["data"])))
+    return events
+
+
+def test_parser_yields_members_as_they_complete():
+    text = "```json\n" + json.dumps(DEFAULT_FEEDBACK, indent=2) + "\n```"
+    parser = JSONSectionParser()
+    sections = []
+    for i in range(0, len(text), 7):
+        sections.extend(parser.feed(text[i:i + 7]))
+    assert dict(sections) == DEFAULT_FEEDBACK
+    assert [key for key, _ in sections] == list(DEFAULT_FEEDBACK)
+    assert parser.done
+
+
+def test_parser_handles_braces_and_commas_inside_strings():
+    parser = JSONSectionParser()
+    sections = list(parser.feed('{"a": "x, {y}", "b": [1, {"c": "]"}]'))
+    sections += list(parser.feed(', "d": "\\"q\\""}'))
+    assert sections == [("a", "x, {y}"), ("b", [1, {"c": "]"}]), ("d", '"q"')]
+
+
+def test_stream_then_cached_replay(client, register):
+    founder = register("FOUNDER")
+    pitch = {"pitch_text": "Digital payments for Kathmandu valley tea shops"}
+
+    events = _events(client.post("/ai/pitch-feedback/stream", headers=founder, json=pitch).text)
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "token" and kinds[-1] == "result"
+    assert "error" not in kinds
+    assert [data["key"] for kind, data in events if kind == "section"] == list(DEFAULT_FEEDBACK)
+    assert events[-1][1] == DEFAULT_FEEDBACK
+
+    # Second request is served from the cache: sections and the result, no tokens
+    replay = _events(client.post("/ai/pitch-feedback/stream", headers=founder, json=pitch).text)
+    assert [kind for kind, _ in replay] == ["section"] * len(DEFAULT_FEEDBACK) + ["result"]
+    assert replay[-1][1] == DEFAULT_FEEDBACK
+
+
+def test_cached_non_object_is_replayed_as_result(client, register, monkeypatch):
+    founder = register("FOUNDER")
+
+    async def cached(db, key):
+        return ["legacy", "feedback"]
+
+    monkeypatch.setattr(pitch_feedback_store, "get", cached)
+    events = _events(client.post("/ai/pitch-feedback/stream", headers=founder, json={"pitch_text": "x"}).text)
+    assert events == [("result", ["legacy", "feedback"])]
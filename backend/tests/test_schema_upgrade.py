@@ -0,0 +1,45 @@
+"""Additive schema upgrade on startup, including workers racing to apply it."""
+import asyncio
+import logging
+import os
+import tempfile
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from database import _apply_schema_changes, _pending_schema_changes, upgrade_schema
+
+
+def test_concurrent_upgrades_tolerate_existing_columns(caplog):
+    caplog.set_level(logging.INFO, logger="database")
+    path = os.path.join(tempfile.mkdtemp(), "old.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    async def run():
+        async with engine.begin() as conn:
+            # users as created before profile_data and created_at existed
+            await conn.execute(text(
+                "CREATE TABLE users (id VARCHAR(36) PRIMARY KEY, email VARCHAR(255) NOT NULL, "
+                "password_hash VARCHAR(255) NOT NULL, role VARCHAR(8) NOT NULL)"
+            ))
+        async with engine.connect() as conn:
+            stale = await conn.run_sync(_pending_schema_changes)
+        assert [name for name, _ in stale if name.startswith("column")] == ["column users.profile_data", "column users.created_at"]
+
+        await upgrade_schema(engine)
+        # A second worker that inspected before the first one applied its changes
+        await _apply_schema_changes(engine, stale)
+
+        async with engine.connect() as conn:
+            columns = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("users")})
+            pending = await conn.run_sync(_pending_schema_changes)
+        await engine.dispose()
+        return columns, pending
+
+    columns, pending = asyncio.run(run())
+    messages = [r.getMessage() for r in caplog.records if r.name == "database"]
+    assert "column users.created_at was added concurrently" in messages
+    assert not [r for r in caplog.records if r.name == "database" and r.levelno >= logging.WARNING]
+    assert {"profile_data", "created_at"} <= columns
+    assert not [name for name, _ in pending if "users" in name]
@@ -0,0 +1,21 @@
+"""Skill bitsets: vectorized batch scoring and a bounded vocabulary."""
+from skills import SkillVocabulary, encode_skills, jaccard_many, overlap_many
+
+
+def test_batch_scores_match_scalar():
+    query = encode_skills(["React.js", "python", "Docker"])
+    candidates = [
+        encode_skills(skills)
+        for skills in (["reactjs", "node"], ["python3", "docker", "k8s"], [], ["figma"], ["zz-rare-skill"] * 3)
+    ]
+    expected = [(query & c).bit_count() / (query | c).bit_count() if c else 0.0 for c in candidates]
+    assert jaccard_many(query, candidates) == expected
+    assert overlap_many(query, candidates) == [((query & c).bit_count(), c.bit_count()) for c in candidates]
+
+
+def test_vocabulary_is_bounded():
+    vocabulary = SkillVocabulary(seed=["python"], max_skills=10, overflow_bits=4)
+    ids = {vocabulary.id_for(f"skill-{n}") for n in range(1000)}
+    assert len(vocabulary) == 10
+    assert max(ids) < 10 + 4
+    assert vocabulary.id_for("Python") == 0
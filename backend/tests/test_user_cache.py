@@ -0,0 +1,58 @@
+"""Authenticated-user cache: invalidation on role changes, rollbacks, TRUST_TOKEN_ROLE."""
+from sqlalchemy import select
+
+import auth
+from auth import decode_token, get_user_by_id_cached, user_cache
+from config import settings
+from database import AsyncSessionLocal
+from models import User, UserRole
+
+
+def _user_id(headers):
+    return decode_token(headers["Authorization"].split()[1])["sub"]
+
+
+def _set_role(client, user_id, role):
+    async def update():
+        async with AsyncSessionLocal() as session:
+            user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+            user.role = role
+            await session.commit()
+    client.portal.call(update)
+
+
+def test_role_change_reaches_the_next_request(client, register, monkeypatch):
+    monkeypatch.setattr(settings, "TRUST_TOKEN_ROLE", False)
+    talent = register("TALENT")
+    assert client.get("/matches/jobs", headers=talent).status_code == 200
+    assert _user_id(talent) in user_cache._data
+
+    _set_role(client, _user_id(talent), UserRole.FOUNDER)
+    assert _user_id(talent) not in user_cache._data
+    assert client.get("/matches/jobs", headers=talent).status_code == 403
+
+
+def test_trust_token_role_uses_the_claim(client, register, monkeypatch):
+    monkeypatch.setattr(settings, "TRUST_TOKEN_ROLE", True)
+    talent = register("TALENT")
+    _set_role(client, _user_id(talent), UserRole.FOUNDER)
+    # The token still says TALENT until it is reissued
+    assert client.get("/matches/jobs", headers=talent).status_code == 200
+
+
+def test_cached_user_survives_a_rollback(client, register):
+    founder = register("FOUNDER")
+    user_id = _user_id(founder)
+    user_cache.delete(user_id)
+
+    async def load_then_roll_back():
+        async with AsyncSessionLocal() as session:
+            await get_user_by_id_cached(session, user_id)
+            await session.rollback()
+        async with AsyncSessionLocal() as session:
+            user = await get_user_by_id_cached(session, user_id)
+            return user.id, user.role
+
+    assert client.portal.call(load_then_roll_back) == (user_id, UserRole.FOUNDER)
+    assert isinstance(user_cache.get(user_id), auth.CachedUser)
+    assert client.get("/founders/profile", headers=founder).status_code == 200
@@ -0,0 +1,142 @@
+"""Optional OpenTelemetry tracing: spans for requests, SQL statements, LLM calls and matching stages.
+
+Needs the opentelemetry-sdk package. With TRACING_ENABLED off (or the package
+missing) every helper here is a no-op.
+"""
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_STATEMENT_MAX_CHARS = 2000
+
+# Set by setup_tracing; the SDK is imported only when tracing is enabled (it costs cold-start time)
+_provider = None
+_tracer = None
+trace = None
+propagate = None
+
+
+def _exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if settings.TRACING_EXPORTER == "otlp":
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if settings.TRACING_EXPORTER == "file":
+        out = open(settings.TRACING_FILE, "a", buffering=1)
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return ConsoleSpanExporter()
+
+
+def setup_tracing() -> bool:
+    """Create the tracer on first use; returns whether tracing is on."""
+    global _provider, _tracer, trace, propagate
+    if _tracer is not None:
+        return True
+    if not settings.TRACING_ENABLED:
+        return False
+    try:
+        from opentelemetry import propagate, trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed; tracing is off")
+        return False
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        # Incoming sampling decisions win; new traces are sampled at the configured ratio
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    _tracer = _provider.get_tracer(__name__)
+    return True
+
+
+def shutdown_tracing():
+    """Export buffered spans and stop the exporter thread."""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+        _tracer = None
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Context manager for a child span of the current one; a no-op while tracing is off."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def server_span(scope):
+    """Span for one HTTP request, continuing the caller's trace from its `traceparent` header."""
+    if _tracer is None:
+        return nullcontext()
+    headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+    return _tracer.start_as_current_span(
+        f"{scope['method']} {scope['path']}",
+        context=propagate.extract(headers),
+        kind=trace.SpanKind.SERVER,
+        attributes={"http.method": scope["method"], "http.target": scope["path"]},
+    )
+
+
+def finish_server_span(span, route: str, status: int, request_id: str):
+    """Name the request span after its route template once routing is done."""
+    if span is None:
+        return
+    span.update_name(f"{span.attributes['http.method']} {route}")
+    span.set_attributes({"http.route": route, "http.status_code": status, "request.id": request_id})
+    if status >= 500:
+        span.set_status(trace.StatusCode.ERROR)
+
+
+def add_event(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Mark a point in time (e.g. admission after queueing) on the current span."""
+    if _tracer is not None:
+        trace.get_current_span().add_event(name, attributes)
+
+
+def record_span(name: str, seconds: float, attributes: Optional[Dict[str, Any]] = None, kind=None,
+                end_ns: Optional[int] = None):
+    """Add an already finished child span that ended at `end_ns` (default now) and took `seconds`.
+
+    Only recorded inside a sampled trace, so startup and background work
+    without a parent span don't produce single-span traces.
+    """
+    if _tracer is None or not trace.get_current_span().is_recording():
+        return
+    end = end_ns or time.time_ns()
+    child = _tracer.start_span(
+        name,
+        kind=kind or trace.SpanKind.INTERNAL,
+        attributes=attributes,
+        start_time=end - int(seconds * 1e9),
+    )
+    child.end(end_time=end)
+
+
+def record_query(statement: str, seconds: float):
+    """Engine hook (see database._query_recorders): one CLIENT span per SQL statement."""
+    if _tracer is None:
+        return
+    operation = statement.split(None, 1)[0].upper() if statement else "SQL"
+    record_span(
+        operation,
+        seconds,
+        {
+            "db.system": settings.DATABASE_URL.split(":", 1)[0].split("+", 1)[0],
+            "db.operation": operation,
+            "db.statement": statement[:_STATEMENT_MAX_CHARS],
+        },
+        kind=trace.SpanKind.CLIENT,
+    )
@@ -0,0 +1,114 @@
+"""Streaming, size-capped, content-addressed storage of uploaded files."""
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from fastapi import UploadFile
+
+from storage import get_storage
+
+
+class UploadRejected(Exception):
+    """The uploaded bytes don't match what was approved (e.g. a different checksum)."""
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the configured maximum size."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredUpload:
+    key: str  # Storage key ("<prefix>/<sha256><ext>")
+    sha256: str
+    size: int
+    deduplicated: bool  # True when identical content was already stored
+
+
+def safe_extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if len(ext) <= 10 and ext[1:].isalnum() else ""
+
+
+def _copy_chunk(src, out, hasher, chunk_size: int) -> int:
+    # One worker-thread hop per chunk for read, hash and write; hashlib and file I/O release the GIL
+    chunk = src.read(chunk_size)
+    if chunk:
+        hasher.update(chunk)
+        out.write(chunk)
+    return len(chunk)
+
+
+def _write_chunk(out, hasher, chunk: bytes):
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+def content_key(prefix: str, sha256_hex: str, filename: str) -> str:
+    return f"{prefix}/{sha256_hex}{safe_extension(filename)}"
+
+
+async def save_upload(file: UploadFile, prefix: str, max_bytes: int, chunk_size: int,
+                      staging_dir: str) -> StoredUpload:
+    """Stream `file` through `staging_dir`, hashing as it goes, and store it under its sha256.
+
+    Reads and writes happen chunk by chunk in worker threads so the event loop
+    never blocks on disk, and the upload is abandoned (and its partial file
+    removed) as soon as it passes `max_bytes`. Identical content is stored once.
+    """
+    await asyncio.to_thread(os.makedirs, staging_dir, exist_ok=True)
+    tmp_path = os.path.join(staging_dir, f"upload-{uuid.uuid4().hex}")
+    hasher = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while True:
+            read = await asyncio.to_thread(_copy_chunk, file.file, out, hasher, chunk_size)
+            if not read:
+                break
+            size += read
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+    await asyncio.to_thread(out.close)
+
+    digest = hasher.hexdigest()
+    key = content_key(prefix, digest, file.filename)
+    deduplicated = await get_storage().put_file(tmp_path, key, file.content_type)
+    return StoredUpload(key=key, sha256=digest, size=size, deduplicated=deduplicated)
+
+
+async def save_stream(chunks: AsyncIterator[bytes], key: str, max_bytes: int, staging_dir: str,
+                      expected_sha256: Optional[str] = None) -> StoredUpload:
+    """Store a raw request body under `key`, refusing it if it doesn't hash to `expected_sha256`."""
+    await asyncio.to_thread(os.makedirs, staging_dir, exist_ok=True)
+    tmp_path = os.path.join(staging_dir, f"upload-{uuid.uuid4().hex}")
+    hasher = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await asyncio.to_thread(_write_chunk, out, hasher, chunk)
+        await asyncio.to_thread(out.close)
+        digest = hasher.hexdigest()
+        if expected_sha256 and digest != expected_sha256:
+            raise UploadRejected("Checksum does not match the approved upload")
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+
+    deduplicated = await get_storage().put_file(tmp_path, key)
+    return StoredUpload(key=key, sha256=digest, size=size, deduplicated=deduplicated)